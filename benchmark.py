@@ -0,0 +1,236 @@
+"""
+성능 측정 스크립트
+
+python benchmark.py import      : import main 시간이 IMPORT_TIME_BUDGET 안에 들어오는지 확인
+python benchmark.py tokenizers  : 형태소 분석기별 처리량 (문장/초, token/초)
+python benchmark.py batching    : 여러 줄을 한 번에 분석한 결과가 줄마다 분석한 결과와 같은지, 얼마나 빠른지
+python benchmark.py quantization MODEL_PATH : float16 / int8 / PQ 벡터의 메모리, 질의 속도, float32 대비 recall@k
+"""
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+BASE_DIR = os.path.abspath(os.path.dirname(__file__))
+BENCHMARK_DATA_PATH = os.path.join(BASE_DIR, 'train', 'park')
+
+# import main 에 허용하는 시간 (초). Mecab, gensim, matplotlib 을 import 시점에 불러오면 이 값을 넘음
+IMPORT_TIME_BUDGET = 0.5
+
+# 무거운 모듈이 import main 만으로 불러와지지 않았는지 확인
+HEAVY_MODULES = ('gensim', 'konlpy', 'matplotlib', 'numpy')
+
+
+def measure_import_time(module='main', repeat=5):
+    """
+    매번 새 프로세스에서 import 해서 (캐시된 모듈 없이) 걸리는 시간을 잼.
+
+    :param module: import 할 모듈 이름
+    :param repeat: 측정 횟수
+    :return: (가장 빠른 import 시간 (초), import 뒤 불러와져 있던 무거운 모듈 리스트)
+    """
+    code = ("import sys, time\n"
+            "start = time.perf_counter()\n"
+            "import %s\n"
+            "elapsed = time.perf_counter() - start\n"
+            "print(elapsed)\n"
+            "print(','.join(name for name in %r if name in sys.modules))\n") % (module, HEAVY_MODULES)
+
+    timings = list()
+    loaded = list()
+    for _ in range(repeat):
+        output = subprocess.check_output([sys.executable, '-c', code], cwd=BASE_DIR, universal_newlines=True)
+        elapsed, modules = output.splitlines()[-2:]
+        timings.append(float(elapsed))
+        loaded = [name for name in modules.split(',') if name]
+
+    return min(timings), loaded
+
+
+def check_import_time(module='main', budget=IMPORT_TIME_BUDGET):
+    """
+    :return: budget 안에 들어오고 무거운 모듈을 불러오지 않았으면 True
+    """
+    elapsed, loaded = measure_import_time(module)
+    print("import %s: %.3fs (budget %.3fs)" % (module, elapsed, budget))
+
+    if loaded:
+        print("heavy modules loaded at import time: %s" % ", ".join(loaded))
+
+    return elapsed <= budget and not loaded
+
+
+def load_lines(datapath=BENCHMARK_DATA_PATH):
+    """
+    :return: datapath 아래 모든 학습 파일의 (빈 줄을 제외한) 줄 리스트
+    """
+    from main import iter_lines
+
+    files = [os.path.join(dirname, filename) for dirname, _, filenames in os.walk(datapath)
+             for filename in filenames if not filename.startswith('.')]
+    return [line for path in sorted(files) for _, line in iter_lines(path)]
+
+
+def benchmark_tokenizers(names=None, datapath=BENCHMARK_DATA_PATH, repeat=3):
+    """
+    :param names: 측정할 형태소 분석기 이름 리스트. None 이면 전부
+    :param datapath: 측정에 사용할 학습 데이터 경로
+    :param repeat: 측정 횟수 (가장 빠른 값을 사용)
+    :return: {분석기 이름: (문장/초, token/초)}. 사용할 수 없는 분석기는 빠짐
+    """
+    from main import BATCH_LINES, tokenize_lines
+    from tokenizer import TOKENIZERS, get_tokenizer
+
+    lines = load_lines(datapath)
+    batches = [lines[i:i + BATCH_LINES] for i in range(0, len(lines), BATCH_LINES)]
+    results = dict()
+
+    for name in names or sorted(TOKENIZERS):
+        try:
+            # 첫 호출에서 분석기를 만드는 시간은 빼고 잼
+            get_tokenizer(name).pos(lines[0] if lines else '')
+        except Exception as error:
+            print("%-10s skipped (%s: %s)" % (name, error.__class__.__name__, error))
+            continue
+
+        best = None
+        tokens = 0
+        for _ in range(repeat):
+            start = time.perf_counter()
+            tokens = sum(len(nouns) for batch in batches for nouns, _ in tokenize_lines(batch, name))
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+
+        best = max(best, 1e-9)
+        results[name] = (len(lines) / best, tokens / best)
+        print("%-10s %10.0f sentences/s %12.0f tokens/s (%d sentences, %d tokens)" % (
+            name, results[name][0], results[name][1], len(lines), tokens))
+
+    return results
+
+
+def benchmark_batching(name='mecab', datapath=BENCHMARK_DATA_PATH, repeat=3):
+    """
+    :param name: 형태소 분석기 이름
+    :param datapath: 측정에 사용할 학습 데이터 경로
+    :param repeat: 측정 횟수 (가장 빠른 값을 사용)
+    :return: 결과가 다른 줄 수
+    """
+    from main import BATCH_LINES
+    from tokenizer import Tokenizer, get_tokenizer
+
+    backend = get_tokenizer(name)
+    lines = load_lines(datapath)
+    batches = [lines[i:i + BATCH_LINES] for i in range(0, len(lines), BATCH_LINES)]
+
+    def per_line():
+        return [tagged for batch in batches for tagged in Tokenizer.pos_batch(backend, batch)]
+
+    def batched():
+        return [tagged for batch in batches for tagged in backend.pos_batch(batch)]
+
+    timings = dict()
+    outputs = dict()
+    for label, func in (('per-line', per_line), ('batched', batched)):
+        func()
+        best = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            outputs[label] = func()
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        timings[label] = max(best, 1e-9)
+        print("%-10s %8.3fs %10.0f sentences/s" % (label, timings[label], len(lines) / timings[label]))
+
+    mismatches = [i for i, (expected, actual) in enumerate(zip(outputs['per-line'], outputs['batched']))
+                  if expected != actual]
+    print("speedup %.2fx, %d/%d lines differ" % (timings['per-line'] / timings['batched'], len(mismatches),
+                                                 len(lines)))
+
+    for i in mismatches[:5]:
+        print("  %r\n    per-line: %r\n    batched:  %r" % (lines[i].strip(), outputs['per-line'][i],
+                                                          outputs['batched'][i]))
+
+    return len(mismatches)
+
+
+def benchmark_quantization(model_path, k=10, sample=1000, dtypes=None):
+    """
+    :param model_path: gensim Word2Vec 모델 경로
+    :param k: recall@k 의 k
+    :param sample: 질의할 단어 수
+    :param dtypes: 비교할 형식 리스트. None 이면 vectors.QUANTIZED_DTYPES 전부와 'pq'
+    :return: {형식: (byte 수, 질의당 초, recall@k)}
+    """
+    from gensim.models import Word2Vec
+    from vectors import QUANTIZED_DTYPES, PQVectorTable, QuantizedVectorTable, VectorTable, recall_at_k
+
+    reference = VectorTable.from_model(Word2Vec.load(model_path))
+    queries = reference.words[:sample]
+    results = dict()
+
+    for name in ['float32'] + list(dtypes or QUANTIZED_DTYPES + ('pq',)):
+        if name == 'float32':
+            table = reference
+        elif name == 'pq':
+            table = PQVectorTable.build(reference)
+        else:
+            table = QuantizedVectorTable.quantize(reference, name)
+
+        start = time.perf_counter()
+        for word in queries:
+            table.most_similar(word, topn=k)
+        per_query = (time.perf_counter() - start) / max(len(queries), 1)
+
+        recall = recall_at_k(reference, table, k, queries)
+        results[name] = (table.nbytes, per_query, recall)
+        print("%-8s %12d bytes (%.2fx) %10.3fms/query recall@%d %.4f" % (
+            name, table.nbytes, reference.nbytes / max(table.nbytes, 1), per_query * 1000, k, recall))
+
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest='command')
+
+    import_parser = commands.add_parser('import', help='import main 시간 측정')
+    import_parser.add_argument('--module', default='main')
+    import_parser.add_argument('--budget', type=float, default=IMPORT_TIME_BUDGET)
+
+    tokenizers_parser = commands.add_parser('tokenizers', help='형태소 분석기별 처리량 측정')
+    tokenizers_parser.add_argument('names', nargs='*')
+    tokenizers_parser.add_argument('--data', default=BENCHMARK_DATA_PATH)
+    tokenizers_parser.add_argument('--repeat', type=int, default=3)
+
+    batching_parser = commands.add_parser('batching', help='여러 줄을 한 번에 분석할 때의 정확도 / 속도')
+    batching_parser.add_argument('name', nargs='?', default='mecab')
+    batching_parser.add_argument('--data', default=BENCHMARK_DATA_PATH)
+    batching_parser.add_argument('--repeat', type=int, default=3)
+
+    quantization_parser = commands.add_parser('quantization', help='양자화 / PQ 벡터의 메모리 / 속도 / recall@k')
+    quantization_parser.add_argument('model_path')
+    quantization_parser.add_argument('--k', type=int, default=10)
+    quantization_parser.add_argument('--sample', type=int, default=1000)
+
+    args = parser.parse_args(argv)
+
+    if args.command == 'import':
+        return 0 if check_import_time(args.module, args.budget) else 1
+
+    if args.command == 'tokenizers':
+        return 0 if benchmark_tokenizers(args.names, args.data, args.repeat) else 1
+
+    if args.command == 'batching':
+        return 0 if benchmark_batching(args.name, args.data, args.repeat) == 0 else 1
+
+    if args.command == 'quantization':
+        return 0 if benchmark_quantization(args.model_path, args.k, args.sample) else 1
+
+    parser.print_help()
+    return 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
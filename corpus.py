@@ -0,0 +1,421 @@
+import hashlib
+import mmap
+import os
+import sys
+from array import array
+from bisect import bisect_right
+from collections import Counter
+from itertools import chain
+
+# 저장 포맷 헤더. 바이트 순서가 다른 머신에서 만든 파일을 그대로 읽지 않도록 함
+CORPUS_FORMAT = 'encoded-corpus 1 %s' % sys.byteorder
+
+
+class Vocabulary:
+    """
+    단어 <-> int id 변환 테이블. 같은 단어는 str 객체 하나만 저장됨.
+    """
+
+    def __init__(self, words=None):
+        """
+        :param words: id 순서대로 정렬된 단어 리스트
+        """
+        self.id2word = list()
+        self.word2id = dict()
+
+        for word in words or list():
+            self.add(word)
+
+    def add(self, word):
+        """
+        :param word: 단어
+        :return: 해당 단어의 id. 처음 보는 단어면 새 id 를 부여함
+        """
+        word_id = self.word2id.get(word)
+        if word_id is None:
+            word_id = self.word2id[word] = len(self.id2word)
+            self.id2word.append(word)
+        return word_id
+
+    def encode(self, words):
+        add = self.add
+        return [add(word) for word in words]
+
+    def decode(self, ids):
+        id2word = self.id2word
+        return [id2word[word_id] for word_id in ids]
+
+    def save(self, path):
+        """
+        :param path: 저장할 파일 경로. 한 줄에 단어 하나씩 id 순서대로 저장
+        """
+        with open(path, 'w', encoding='utf-8') as fp:
+            fp.write(CORPUS_FORMAT + '\n')
+            for word in self.id2word:
+                fp.write(word + '\n')
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'r', encoding='utf-8') as fp:
+            header = fp.readline().rstrip('\n')
+            if header != CORPUS_FORMAT:
+                raise ValueError("%s: unsupported corpus format %r" % (path, header))
+            return cls(line.rstrip('\n') for line in fp)
+
+    def __len__(self):
+        return len(self.id2word)
+
+    def __contains__(self, word):
+        return word in self.word2id
+
+    def __repr__(self):
+        return "<Vocabulary %d words>" % len(self)
+
+
+class EncodedCorpus:
+    """
+    문장 리스트를 int32 token id 배열 하나와 문장 시작 위치 배열로 저장하는 corpus.
+    gensim 에는 iter() 할 때마다 단어 리스트로 바꿔서 넘겨줌.
+
+    sentence i 의 token 은 tokens[offsets[i]:offsets[i + 1]]
+    """
+
+    def __init__(self, vocabulary=None, tokens=None, offsets=None):
+        """
+        :param vocabulary: 공유할 Vocabulary. None 이면 새로 만듦
+        :param tokens: token id 버퍼 (array('i') 또는 int32 memoryview)
+        :param offsets: 문장 시작 위치 버퍼 (array('q') 또는 int64 memoryview). offsets[0] == 0
+        """
+        self.vocabulary = Vocabulary() if vocabulary is None else vocabulary
+        self.tokens = array('i') if tokens is None else tokens
+        self.offsets = array('q', [0]) if offsets is None else offsets
+
+    @classmethod
+    def from_sentences(cls, sentences, vocabulary=None):
+        """
+        :param sentences: 단어 리스트의 iterable
+        :param vocabulary: 공유할 Vocabulary
+        :return: EncodedCorpus
+        """
+        corpus = cls(vocabulary)
+        corpus.extend(sentences)
+        return corpus
+
+    def append(self, sentence):
+        """
+        :param sentence: 단어 리스트
+        """
+        self.tokens.extend(self.vocabulary.encode(sentence))
+        self.offsets.append(len(self.tokens))
+
+    def extend(self, sentences):
+        for sentence in sentences:
+            self.append(sentence)
+
+    def __iadd__(self, other):
+        self.extend(other)
+        return self
+
+    def sentence_ids(self, index):
+        """
+        :param index: 문장 번호
+        :return: 해당 문장의 token id 버퍼
+        """
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError('sentence index out of range')
+        return self.tokens[self.offsets[index]:self.offsets[index + 1]]
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        return self.vocabulary.decode(self.sentence_ids(index))
+
+    def __iter__(self):
+        decode = self.vocabulary.decode
+        tokens = self.tokens
+        offsets = self.offsets
+
+        for i in range(len(self)):
+            yield decode(tokens[offsets[i]:offsets[i + 1]])
+
+    def save(self, path, save_vocabulary=True):
+        """
+        token / offset 버퍼를 그대로 파일로 씀. (path.tokens, path.offsets, path.words)
+
+        :param path: 저장할 경로 (확장자 제외)
+        :param save_vocabulary: False 일 경우 Vocabulary 는 저장하지 않음 (여러 corpus 가 공유할 때)
+        """
+        with open(path + '.tokens', 'wb') as fp:
+            fp.write(array('i', self.tokens).tobytes())
+        with open(path + '.offsets', 'wb') as fp:
+            fp.write(array('q', self.offsets).tobytes())
+
+        if save_vocabulary:
+            self.vocabulary.save(path + '.words')
+
+    @classmethod
+    def load(cls, path, vocabulary=None, mmap=True):
+        """
+        :param path: save() 로 저장한 경로 (확장자 제외)
+        :param vocabulary: 공유할 Vocabulary. None 이면 path.words 에서 읽음
+        :param mmap: True 일 경우 파일을 메모리에 복사하지 않고 mmap 함.
+                     같은 파일을 여러 프로세스가 읽으면 page cache 를 공유함. (읽기 전용)
+        :return: EncodedCorpus
+        """
+        if vocabulary is None:
+            vocabulary = Vocabulary.load(path + '.words')
+
+        return cls(vocabulary, read_buffer(path + '.tokens', 'i', mmap), read_buffer(path + '.offsets', 'q', mmap))
+
+    def fingerprint(self):
+        """
+        :return: 문장 내용의 hash (ModelStore key 에 사용)
+        """
+        return sentences_digest(self)
+
+    @property
+    def nbytes(self):
+        """
+        :return: token / offset 버퍼가 차지하는 byte 수 (Vocabulary 제외)
+        """
+        return len(self.tokens) * self.tokens.itemsize + len(self.offsets) * self.offsets.itemsize
+
+    def __repr__(self):
+        return "<EncodedCorpus %d sentences, %d tokens, %d words>" % (len(self), len(self.tokens),
+                                                                      len(self.vocabulary))
+
+
+class ChainedCorpus:
+    """
+    여러 corpus 를 복사하지 않고 이어붙인 읽기 전용 view.
+    원본 corpus 는 바뀌지 않고, 합치는 비용은 문장 수가 아니라 corpus 개수에 비례함.
+    """
+
+    def __init__(self, parts):
+        """
+        :param parts: MakeSentence, EncodedCorpus, ChainedCorpus 등 len / [] / iter 가 되는 corpus 리스트
+        """
+        self.parts = list()
+        for part in parts:
+            # ChainedCorpus 끼리 합칠 때 중첩되지 않도록 펼침
+            self.parts += part.parts if isinstance(part, ChainedCorpus) else [part]
+
+        # ends[i] : parts[:i + 1] 의 문장 수 합. bisect 로 index 가 속한 part 를 찾음
+        self.ends = list()
+        total = 0
+        for part in self.parts:
+            total += len(part)
+            self.ends.append(total)
+
+        self.datapath = " + ".join(str(getattr(part, 'datapath', part)) for part in self.parts)
+
+    @property
+    def vocab(self):
+        """
+        :return: 각 part 의 vocab 을 이어붙인 ChainedCorpus
+        """
+        return ChainedCorpus([part.vocab for part in self.parts])
+
+    def __len__(self):
+        return self.ends[-1] if self.ends else 0
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError('sentence index out of range')
+
+        part_number = bisect_right(self.ends, index)
+        start = self.ends[part_number - 1] if part_number else 0
+        return self.parts[part_number][index - start]
+
+    def __iter__(self):
+        return chain.from_iterable(self.parts)
+
+    def __add__(self, other):
+        return ChainedCorpus([self, other])
+
+    def fingerprint(self):
+        """
+        :return: 각 part 의 fingerprint 를 순서대로 이어서 만든 hash
+        """
+        digest = hashlib.sha1()
+        for part in self.parts:
+            digest.update(part.fingerprint().encode('ascii') if hasattr(part, 'fingerprint')
+                          else sentences_digest(part).encode('ascii'))
+        return digest.hexdigest()
+
+    def __repr__(self):
+        return "<ChainedCorpus %s (%d sentences)>" % (self.datapath, len(self))
+
+
+def sentences_digest(sentences):
+    """
+    :param sentences: 단어 리스트의 iterable
+    :return: 문장 내용 (단어와 문장 경계) 의 sha1 hex digest
+    """
+    digest = hashlib.sha1()
+    for sentence in sentences:
+        digest.update(" ".join(sentence).encode('utf-8'))
+        digest.update(b'\n')
+    return digest.hexdigest()
+
+
+def count_words(corpus):
+    """
+    :param corpus: 단어 리스트의 iterable. EncodedCorpus 면 numpy.bincount 로 한 번에 셈
+    :return: {단어: 등장 횟수}
+    """
+    if isinstance(corpus, EncodedCorpus):
+        import numpy
+
+        counts = numpy.bincount(numpy.frombuffer(corpus.tokens, dtype=numpy.int32),
+                                minlength=len(corpus.vocabulary))
+        return dict(zip(corpus.vocabulary.id2word, counts.tolist()))
+
+    counter = Counter()
+    for sentence in corpus:
+        counter.update(sentence)
+    return counter
+
+
+def select_vocabulary(counts, min_count=1, stop_words=(), max_vocab=None):
+    """
+    :param counts: {단어: 등장 횟수}
+    :param min_count: 이보다 적게 나온 단어는 버림
+    :param stop_words: 버릴 단어 목록
+    :param max_vocab: 남길 최대 단어 수 (많이 나온 순). None 이면 제한 없음
+    :return: 남길 단어의 Vocabulary (id 는 많이 나온 순서)
+    """
+    stop_words = set(stop_words)
+    words = [word for word, count in counts.items() if count >= min_count and word not in stop_words]
+    # 횟수가 같으면 원래 순서를 유지 (sort 는 stable)
+    words.sort(key=lambda word: counts[word], reverse=True)
+
+    if max_vocab is not None:
+        words = words[:max_vocab]
+
+    return Vocabulary(words)
+
+
+def prune_corpus(corpus, vocabulary):
+    """
+    vocabulary 에 없는 단어를 지운 corpus 를 새로 만듦. 단어가 모두 지워진 문장은 뺌.
+
+    :param corpus: 단어 리스트의 iterable. EncodedCorpus 면 numpy 로 id 를 한 번에 바꿈
+    :param vocabulary: select_vocabulary() 로 고른 Vocabulary
+    :return: vocabulary 를 사용하는 EncodedCorpus
+    """
+    if not isinstance(corpus, EncodedCorpus):
+        word2id = vocabulary.word2id
+        return EncodedCorpus.from_sentences(
+            (sentence for sentence in ([word for word in sentence if word in word2id] for sentence in corpus)
+             if sentence), vocabulary)
+
+    import numpy
+
+    # 예전 id -> 새 id (-1 : 지울 단어)
+    mapping = numpy.array([vocabulary.word2id.get(word, -1) for word in corpus.vocabulary.id2word] or [-1],
+                          dtype=numpy.int32)
+    tokens = mapping[numpy.frombuffer(corpus.tokens, dtype=numpy.int32)]
+    keep = tokens >= 0
+
+    # 남은 token 수의 누적합으로 새 문장 시작 위치를 구함
+    kept_before = numpy.concatenate([[0], numpy.cumsum(keep)])
+    offsets = kept_before[numpy.frombuffer(corpus.offsets, dtype=numpy.int64)]
+    offsets = numpy.concatenate([[0], offsets[1:][numpy.diff(offsets) > 0]])
+
+    pruned = EncodedCorpus(vocabulary, array('i'), array('q'))
+    pruned.tokens.frombytes(tokens[keep].astype(numpy.int32).tobytes())
+    pruned.offsets.frombytes(offsets.astype(numpy.int64).tobytes())
+    return pruned
+
+
+def read_buffer(path, typecode, use_mmap=True):
+    """
+    :param path: array 를 그대로 저장한 파일 경로
+    :param typecode: array typecode ('i' : int32, 'q' : int64)
+    :param use_mmap: True 일 경우 mmap 한 memoryview 를 반환
+    :return: typecode 형식의 읽기 전용 memoryview 또는 array
+    """
+    if use_mmap and os.path.getsize(path) > 0:
+        with open(path, 'rb') as fp:
+            mapped = mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ)
+        return memoryview(mapped).cast(typecode)
+
+    buffer = array(typecode)
+    with open(path, 'rb') as fp:
+        buffer.frombytes(fp.read())
+    return buffer
+
+
+class CorpusWriter:
+    """
+    문장을 메모리에 모으지 않고 바로 EncodedCorpus 파일 포맷으로 씀.
+    RAM 보다 큰 corpus 를 저장할 때 사용.
+
+    with CorpusWriter(path, vocabulary) as writer:
+        for sentence in sentences:
+            writer.append(sentence)
+    """
+
+    def __init__(self, path, vocabulary=None):
+        """
+        :param path: 저장할 경로 (확장자 제외)
+        :param vocabulary: 공유할 Vocabulary. 파일로 저장하는 것은 호출하는 쪽에서 함
+        """
+        self.path = path
+        self.vocabulary = Vocabulary() if vocabulary is None else vocabulary
+        self.length = 0
+        self.tokens_fp = None
+        self.offsets_fp = None
+
+    def __enter__(self):
+        self.tokens_fp = open(self.path + '.tokens', 'wb')
+        self.offsets_fp = open(self.path + '.offsets', 'wb')
+        self.offsets_fp.write(array('q', [0]).tobytes())
+        return self
+
+    def append(self, sentence):
+        ids = array('i', self.vocabulary.encode(sentence))
+        self.tokens_fp.write(ids.tobytes())
+        self.length += len(ids)
+        self.offsets_fp.write(array('q', [self.length]).tobytes())
+
+    def extend(self, sentences):
+        for sentence in sentences:
+            self.append(sentence)
+
+    def __exit__(self, *exc_info):
+        self.tokens_fp.close()
+        self.offsets_fp.close()
+
+
+def save_corpus(sentences, path, vocabulary=None, save_vocabulary=True):
+    """
+    :param sentences: 단어 리스트의 iterable (MakeSentence, SentenceStream, EncodedCorpus 등)
+    :param path: 저장할 경로 (확장자 제외)
+    :param vocabulary: 공유할 Vocabulary
+    :param save_vocabulary: False 일 경우 Vocabulary 는 저장하지 않음
+    :return: 사용한 Vocabulary
+    """
+    if isinstance(sentences, EncodedCorpus) and (vocabulary is None or vocabulary is sentences.vocabulary):
+        # 이미 인코딩되어 있으면 버퍼를 그대로 씀
+        sentences.save(path, save_vocabulary)
+        return sentences.vocabulary
+
+    with CorpusWriter(path, vocabulary) as writer:
+        writer.extend(sentences)
+
+    if save_vocabulary:
+        writer.vocabulary.save(path + '.words')
+
+    return writer.vocabulary
@@ -1,11 +1,22 @@
-from gensim.models import word2vec
-
-
-def make_model2json(model_path):
+def make_model2json(model_path, mmap=False):
+    """
+    :param model_path: gensim Word2Vec 모델 경로
+    :param mmap: True 일 경우 모델을 저장할 때 같이 저장한 정규화 벡터 파일을 읽기 전용 mmap 으로 읽음.
+                 여러 프로세스가 같은 모델을 export 할 때 벡터를 복사하지 않고 공유함
+    """
     print("Loading model...")
-    # model = word2vec.Word2Vec.load_word2vec_format(model_path, binary=True)  # C binary format
-    model = word2vec.Word2Vec()
-    model = model.load(model_path)
+    if mmap:
+        from vectors import load_shared
+        model = load_shared(model_path)
+        words = model.words
+    else:
+        # gensim 은 import 가 느리므로 실제로 사용할 때 import 함
+        from gensim.models import word2vec
+
+        # model = word2vec.Word2Vec.load_word2vec_format(model_path, binary=True)  # C binary format
+        model = word2vec.Word2Vec()
+        model = model.load(model_path)
+        words = list(model.vocab)
     print("Loading model: Done")
 
     # Name of output file
@@ -13,10 +24,10 @@ def make_model2json(model_path):
 
     f.write("{\n")
 
-    number_words = len(model.vocab)
+    number_words = len(words)
     # number_words = 10000
     for i in range(0, number_words):
-        string_tmp = list(model.vocab.items())[i][0]
+        string_tmp = words[i]
         f.write("\n\"" + string_tmp + "\":[\n")
 
         nearest_words = model.most_similar(positive=[string_tmp], negative=[], topn=20)
@@ -0,0 +1,144 @@
+import hashlib
+from collections import namedtuple
+
+import numpy
+
+# MinHash signature 길이 (= LSH band 수 * band 당 row 수)
+NUM_PERM = 128
+LSH_BANDS = 32
+# 이 값 이상 겹치는 (추정 Jaccard 유사도) 문서는 같은 연설로 봄
+DEFAULT_THRESHOLD = 0.8
+# 연속된 명사 몇 개를 하나의 shingle 로 볼지
+SHINGLE_SIZE = 3
+
+DuplicateRecord = namedtuple('DuplicateRecord', ['dropped', 'kept', 'similarity'])
+
+
+def stable_hash(text):
+    """
+    :return: 실행할 때마다 바뀌지 않는 64bit hash (내장 hash() 는 PYTHONHASHSEED 에 따라 바뀜)
+    """
+    return int.from_bytes(hashlib.blake2b(text.encode('utf-8'), digest_size=8).digest(), 'little')
+
+
+def document_hash(sentences):
+    """
+    :param sentences: 문서의 문장 (단어 리스트) 리스트
+    :return: 문장 hash 를 이어서 만든 문서 hash. 완전히 같은 문서를 찾을 때 사용
+    """
+    digest = hashlib.sha1()
+    for sentence in sentences:
+        digest.update(stable_hash(" ".join(sentence)).to_bytes(8, 'little'))
+    return digest.hexdigest()
+
+
+def shingles(sentences, size=SHINGLE_SIZE):
+    """
+    문장을 모두 이어붙인 명사열에서 size 개씩 묶은 shingle 의 hash 집합.
+    문장을 이어붙이기 때문에 줄바꿈 위치만 다른 문서도 거의 같은 집합이 나옴.
+
+    :param sentences: 문서의 문장 (단어 리스트) 리스트
+    :return: uint64 numpy array
+    """
+    words = [word for sentence in sentences for word in sentence]
+    if len(words) < size:
+        grams = {" ".join(words)} if words else set()
+    else:
+        grams = {" ".join(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+    return numpy.array(sorted(stable_hash(gram) for gram in grams), dtype=numpy.uint64)
+
+
+class MinHashLSH:
+    """
+    MinHash signature 와 banding LSH 로 비슷한 문서 후보를 찾음.
+    hash 함수는 uint64 곱셈 (overflow 허용) 후 상위 32bit 를 쓰는 multiply-shift 방식.
+    """
+
+    def __init__(self, num_perm=NUM_PERM, bands=LSH_BANDS, seed=1):
+        if num_perm % bands:
+            raise ValueError("num_perm(%d) must be a multiple of bands(%d)" % (num_perm, bands))
+
+        random = numpy.random.RandomState(seed)
+        # 홀수 곱셈 계수여야 multiply-shift hash 가 제대로 섞임
+        self.a = random.randint(1, 2 ** 62, size=num_perm, dtype=numpy.uint64) * 2 + 1
+        self.b = random.randint(0, 2 ** 62, size=num_perm, dtype=numpy.uint64)
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.buckets = [dict() for _ in range(bands)]
+
+    def signature(self, shingle_hashes, block_size=4096):
+        """
+        :param shingle_hashes: shingles() 의 결과
+        :param block_size: 한 번에 계산할 shingle 수 (num_perm * block_size 크기의 임시 배열을 만듦)
+        :return: num_perm 길이의 uint64 signature
+        """
+        signature = numpy.full(len(self.a), numpy.iinfo(numpy.uint64).max, dtype=numpy.uint64)
+
+        with numpy.errstate(over='ignore'):
+            for start in range(0, len(shingle_hashes), block_size):
+                block = shingle_hashes[start:start + block_size]
+                hashed = (self.a[:, None] * block[None, :] + self.b[:, None]) >> numpy.uint64(32)
+                numpy.minimum(signature, hashed.min(axis=1), out=signature)
+
+        return signature
+
+    def query(self, signature):
+        """
+        :return: 같은 band 를 하나 이상 공유하는 (이미 추가된) 문서 key 집합
+        """
+        candidates = set()
+        for band, bucket in enumerate(self.buckets):
+            candidates.update(bucket.get(self.band_key(signature, band), ()))
+        return candidates
+
+    def insert(self, key, signature):
+        for band, bucket in enumerate(self.buckets):
+            bucket.setdefault(self.band_key(signature, band), list()).append(key)
+
+    def band_key(self, signature, band):
+        return signature[band * self.rows:(band + 1) * self.rows].tobytes()
+
+
+def deduplicate(documents, threshold=None, num_perm=NUM_PERM, bands=LSH_BANDS):
+    """
+    먼저 들어온 문서를 남기고, 그 문서와 같거나 거의 같은 문서를 버림.
+
+    :param documents: (문서 이름, 문장 리스트) 리스트
+    :param threshold: 추정 Jaccard 유사도가 이 값 이상이면 중복으로 봄. None 이면 DEFAULT_THRESHOLD
+    :param num_perm: MinHash signature 길이
+    :param bands: LSH band 수
+    :return: (남길 문서 번호 리스트, 버린 문서의 DuplicateRecord 리스트)
+    """
+    if threshold is None:
+        threshold = DEFAULT_THRESHOLD
+
+    lsh = MinHashLSH(num_perm, bands)
+    exact = dict()
+    signatures = dict()
+    kept = list()
+    report = list()
+
+    for index, (name, sentences) in enumerate(documents):
+        digest = document_hash(sentences)
+        if digest in exact:
+            report.append(DuplicateRecord(name, documents[exact[digest]][0], 1.0))
+            continue
+
+        signature = lsh.signature(shingles(sentences))
+        best, best_similarity = None, 0.0
+        for candidate in lsh.query(signature):
+            similarity = float(numpy.mean(signatures[candidate] == signature))
+            if similarity > best_similarity:
+                best, best_similarity = candidate, similarity
+
+        if best is not None and best_similarity >= threshold:
+            report.append(DuplicateRecord(name, documents[best][0], best_similarity))
+            continue
+
+        exact[digest] = index
+        signatures[index] = signature
+        lsh.insert(index, signature)
+        kept.append(index)
+
+    return kept, report
@@ -5,18 +5,37 @@ https://github.com/pvthuy/word2vec-visualization
 발표 끝나고 학습시킨 모델을 바탕으로 위 사이트 처럼 Visualization 시키는 것도 나쁘지 않을 듯
 
 """
+import bz2
+import gzip
+import hashlib
+import heapq
+import json
+import lzma
 import os
 import random
+import shutil
 import string
-
-from mpl_toolkits.mplot3d import Axes3D
-import matplotlib.pyplot as plt
-import matplotlib
-
-from numpy import cov, mat, mean, array
-from numpy import linalg as lin
+import sys
+import time
+import tracemalloc
+from array import array
+from collections import deque, namedtuple
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from itertools import chain, islice
+
+from corpus import ChainedCorpus, EncodedCorpus, Vocabulary, count_words, prune_corpus, save_corpus, \
+    select_vocabulary, sentences_digest
+from create_json_cosine import make_model2json
+from manifest import CorpusManifest
+from model_store import ModelStore
+from token_cache import TokenCache, file_digest
+from tokenizer import DEFAULT_TOKENIZER, NOUN_TAG_PREFIX, get_tokenizer, reset_tokenizers
 
 """
+matplotlib, numpy, gensim, konlpy 는 import 하는 데만 몇 초가 걸리므로
+실제로 사용하는 함수 안에서 import 함. (import main 은 빠르게)
+
+numpy
 mat : 기본 행렬
 cov : 공분산 행렬
 linalg : linear algebra 선형대수 모듈
@@ -24,17 +43,50 @@ mean : Average
 
 """
 
-matplotlib.rc('font', family='NanumGothic')
+# vocab 을 만들 때 사용하는 품사 (일반명사, 고유명사)
+VOCAB_TAGS = ('NNG', 'NNP')
 
-from gensim.models import Word2Vec
-from konlpy.tag import Mecab
+# 학습에 사용할 최소 등장 횟수 (Word2Vec min_count)
+MIN_COUNT = 20
+# 의미 없이 자주 나오는 의존 / 대명사성 명사. MakeSentence.prune 에서 지움
+STOP_NOUNS = ('것', '수', '등', '때', '중', '데', '뿐', '바', '듯', '이', '그', '저')
 
-from create_json_cosine import make_model2json
+# 학습 중 checkpoint 를 저장하는 간격 (문장 수) 과 마지막 checkpoint 정보 파일 이름
+CHECKPOINT_SENTENCES = 100000
+CHECKPOINT_STATE = 'latest.json'
+
+# TrainModel[i] 로 이보다 앞쪽 단어를 찾을 때는 전체 정렬 대신 heap 으로 상위 단어만 고름
+TOP_VOCAB_LIMIT = 1000
 
-mecab = Mecab()
+# 병렬 분석 시 큰 파일을 나누는 단위 (byte)
+CHUNK_SIZE = 4 * 1024 * 1024
+
+# 압축된 학습 파일 형식 (확장자 / magic number)
+COMPRESSION_EXTENSIONS = {'.gz': 'gzip', '.bz2': 'bz2', '.xz': 'xz'}
+COMPRESSION_MAGIC = (('gzip', b'\x1f\x8b'), ('bz2', b'BZh'), ('xz', b'\xfd7zXZ\x00'))
+
+# 파일을 읽을 때 한 번에 처리하는 줄 묶음 크기 (줄 수 / byte)
+BATCH_LINES = 1000
+MAX_BATCH_BYTES = 1024 * 1024
 
 BASE_DIR = os.path.abspath(os.path.dirname(__file__))
 TRAIN_DATA_PATH = os.path.join(BASE_DIR, 'train')
+TOKEN_CACHE_PATH = os.path.join(BASE_DIR, '.cache', 'tokens')
+MODEL_OUTPUT_PATH = os.path.join(BASE_DIR, 'models')
+MODEL_STORE_PATH = os.path.join(BASE_DIR, '.cache', 'models')
+
+
+def load_pyplot():
+    """
+    :return: 한글 폰트를 설정하고 3d projection 을 등록한 matplotlib.pyplot
+    """
+    import matplotlib
+    matplotlib.rc('font', family='NanumGothic')
+
+    from mpl_toolkits.mplot3d import Axes3D  # noqa: F401 ('3d' projection 등록)
+    import matplotlib.pyplot as plt
+
+    return plt
 
 
 def randomkey(length):
@@ -46,17 +98,368 @@ def randomkey(length):
     return ''.join(random.choice(string.ascii_lowercase) for i in range(length))
 
 
+class SentenceStream:
+    """
+    파일을 메모리에 올리지 않고 매번 다시 읽으며 문장을 만들어내는 재시작 가능한 iterable.
+    gensim 은 epoch 마다 iter() 를 다시 호출하므로 generator 가 아닌 객체여야 함.
+    """
+
+    def __init__(self, files, tokenizer=DEFAULT_TOKENIZER, max_batch_bytes=None):
+        """
+        :param files: 학습 파일 경로 리스트
+        :param tokenizer: 형태소 분석기 이름 (tokenizer.TOKENIZERS)
+        :param max_batch_bytes: 한 번에 형태소 분석할 줄 묶음의 최대 크기 (byte). None 이면 MAX_BATCH_BYTES
+        """
+        self.files = files
+        self.tokenizer = tokenizer
+        self.max_batch_bytes = max_batch_bytes
+        # (파일 번호, 해당 줄의 byte offset) 인덱스. __len__ / __getitem__ 에서 사용
+        self.file_index = array('I')
+        self.offsets = array('q')
+
+        for file_number, train_file in enumerate(files):
+            for offset, line in iter_lines(train_file):
+                self.file_index.append(file_number)
+                self.offsets.append(offset)
+
+    def __iter__(self):
+        return self.iter_from(0)
+
+    def iter_from(self, start):
+        """
+        앞의 문장들을 형태소 분석하지 않고 start 번째 문장이 있는 위치부터 바로 읽음.
+        (checkpoint 에서 이어서 학습할 때 사용)
+
+        :param start: 시작할 문장 번호
+        :return: start 번째 문장부터 명사 리스트를 하나씩 반환하는 generator
+        """
+        if start >= len(self):
+            return
+
+        first_file = self.file_index[start]
+        for file_number in range(first_file, len(self.files)):
+            offset = self.offsets[start] if file_number == first_file else 0
+            for batch in iter_line_batches(self.files[file_number], offset, max_batch_bytes=self.max_batch_bytes):
+                for nouns, _ in tokenize_lines(batch, self.tokenizer):
+                    yield nouns
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+
+        with open_train_file(self.files[self.file_index[index]]) as fp:
+            fp.seek(self.offsets[index])
+            # __iter__ 와 같은 결과가 나오도록 pos_batch 경로로 분석함
+            return tokenize_lines([fp.readline().decode('utf-8')], self.tokenizer)[0][0]
+
+
+class VocabStream:
+    """
+    파일 단위 명사(NNG, NNP) 목록을 매번 다시 만들어내는 재시작 가능한 iterable.
+    """
+
+    def __init__(self, files, tokenizer=DEFAULT_TOKENIZER, max_batch_bytes=None):
+        self.files = files
+        self.tokenizer = tokenizer
+        self.max_batch_bytes = max_batch_bytes
+
+    def __iter__(self):
+        for train_file in self.files:
+            yield tokenize_file(train_file, tokenizer=self.tokenizer, max_batch_bytes=self.max_batch_bytes)[1]
+
+    def __len__(self):
+        return len(self.files)
+
+
+def split_tags(tagged):
+    """
+    pos 결과 하나로 문장용 명사 리스트와 vocab 용 명사(NNG, NNP) 리스트를 함께 만듦.
+    nouns 는 내부적으로 pos 를 다시 호출하므로 따로 부르지 않음.
+
+    :param tagged: [(단어, 품사 태그), ...]
+    :return: (명사 리스트, NNG/NNP 명사 리스트)
+    """
+    nouns = [word for word, tag in tagged if tag.startswith(NOUN_TAG_PREFIX)]
+    vocab_nouns = [word for word, tag in tagged if tag in VOCAB_TAGS]
+    return nouns, vocab_nouns
+
+
+def tokenize_lines(lines, tokenizer=DEFAULT_TOKENIZER):
+    """
+    :param lines: 형태소 분석할 문장 리스트
+    :param tokenizer: 형태소 분석기 이름
+    :return: 문장마다 (명사 리스트, NNG/NNP 명사 리스트)
+    """
+    return [split_tags(tagged) for tagged in get_tokenizer(tokenizer).pos_batch(lines)]
+
+
+def tokenize_file(path, start=0, end=None, tokenizer=DEFAULT_TOKENIZER, max_batch_bytes=None):
+    """
+    :param path: 파일 경로
+    :param start: 분석을 시작할 byte offset (줄의 시작이어야 함)
+    :param end: 분석을 끝낼 byte offset. None 이면 파일 끝까지
+    :param tokenizer: 형태소 분석기 이름
+    :param max_batch_bytes: 한 번에 형태소 분석할 줄 묶음의 최대 크기 (byte). None 이면 MAX_BATCH_BYTES
+    :return: (해당 구간의 문장 리스트, 해당 구간의 NNG/NNP 명사 리스트)
+    """
+    sentences = list()
+    vocab_doc = list()
+
+    for batch in iter_line_batches(path, start, end, max_batch_bytes=max_batch_bytes):
+        for nouns, vocab_nouns in tokenize_lines(batch, tokenizer):
+            sentences.append(nouns)
+            vocab_doc += vocab_nouns
+
+    return sentences, vocab_doc
+
+
+def measure_peak_memory(func, *args):
+    """
+    tracemalloc 으로 func 실행 중 Python 객체가 사용한 최대 메모리를 잼.
+    (Mecab 내부 C 메모리는 포함되지 않음)
+
+    :return: (func 결과, 최대 메모리 byte 수)
+    """
+    tracing = tracemalloc.is_tracing()
+    if not tracing:
+        tracemalloc.start()
+    elif hasattr(tracemalloc, 'reset_peak'):
+        tracemalloc.reset_peak()
+
+    base = tracemalloc.get_traced_memory()[0]
+    try:
+        result = func(*args)
+        peak = tracemalloc.get_traced_memory()[1] - base
+    finally:
+        if not tracing:
+            tracemalloc.stop()
+
+    return result, max(peak, 0)
+
+
+def tokenize_chunk(chunk):
+    """
+    ProcessPoolExecutor 작업 단위. pickle 가능해야 하므로 모듈 레벨 함수로 둠.
+
+    :param chunk: (파일 경로, 시작 offset, 끝 offset, 형태소 분석기 이름, 메모리 측정 여부, 줄 묶음 최대 크기)
+    :return: (문장 리스트, NNG/NNP 명사 리스트, 최대 메모리 byte 수 또는 None)
+    """
+    path, start, end, tokenizer, profile_memory, max_batch_bytes = chunk
+
+    if profile_memory:
+        (sentences, vocab_doc), peak = measure_peak_memory(tokenize_file, path, start, end, tokenizer,
+                                                           max_batch_bytes)
+        return sentences, vocab_doc, peak
+
+    return tokenize_file(path, start, end, tokenizer, max_batch_bytes) + (None,)
+
+
+def init_worker():
+    """
+    worker 프로세스마다 형태소 분석기를 새로 만듦. (부모 프로세스의 tagger 를 공유하지 않음)
+    """
+    reset_tokenizers()
+
+
+def split_file(path, chunk_size=CHUNK_SIZE):
+    """
+    큰 파일을 여러 worker 가 나눠서 분석할 수 있도록 줄 단위로 맞춘 구간으로 나눔.
+
+    :param path: 파일 경로
+    :param chunk_size: 구간 하나의 대략적인 byte 크기
+    :return: [(시작 offset, 끝 offset), ...]
+    """
+    if compression(path) is not None:
+        # 압축 파일은 임의 위치에서 읽기 시작할 수 없으므로 파일 하나를 통째로 분석
+        return [(0, None)]
+
+    size = os.path.getsize(path)
+    chunks = list()
+    start = 0
+
+    with open(path, 'rb') as fp:
+        while start < size:
+            fp.seek(start + chunk_size)
+            # 구간 경계를 다음 줄의 시작으로 맞춤
+            fp.readline()
+            end = min(fp.tell(), size)
+            chunks.append((start, end))
+            start = end
+
+    return chunks or [(0, 0)]
+
+
+def tokenize_parallel(paths, workers, chunk_size=CHUNK_SIZE, memory_report=None, tokenizer=DEFAULT_TOKENIZER,
+                      max_batch_bytes=None):
+    """
+    파일을 구간으로 나누어 여러 프로세스에서 형태소 분석함. 결과 순서는 입력 순서와 같음.
+
+    :param paths: 파일 경로 리스트
+    :param workers: worker 프로세스 수
+    :param chunk_size: 구간 하나의 대략적인 byte 크기
+    :param memory_report: dict 를 넘기면 {파일 경로: 구간별 최대 메모리 중 최댓값} 을 채움
+    :param tokenizer: 형태소 분석기 이름
+    :param max_batch_bytes: 한 번에 형태소 분석할 줄 묶음의 최대 크기 (byte). None 이면 MAX_BATCH_BYTES
+    :return: 파일 순서대로 (파일 경로, 문장 리스트, NNG/NNP 명사 리스트) generator
+    """
+    profile_memory = memory_report is not None
+    chunks = [(path, start, end, tokenizer, profile_memory, max_batch_bytes)
+              for path in paths for start, end in split_file(path, chunk_size)]
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker) as executor:
+        current_path = None
+        sentences = vocab_doc = None
+
+        # executor.map 은 입력 순서대로 결과를 돌려주므로 문장 순서가 항상 같음
+        for chunk, (chunk_sentences, chunk_vocab, peak) in zip(chunks, executor.map(tokenize_chunk, chunks)):
+            path = chunk[0]
+            if path != current_path:
+                if current_path is not None:
+                    yield current_path, sentences, vocab_doc
+                current_path, sentences, vocab_doc = path, list(), list()
+
+            sentences += chunk_sentences
+            vocab_doc += chunk_vocab
+
+            if profile_memory:
+                memory_report[path] = max(memory_report.get(path, 0), peak)
+
+        if current_path is not None:
+            yield current_path, sentences, vocab_doc
+
+
+def corpus_fingerprint(sentences):
+    """
+    :param sentences: MakeSentence, ChainedCorpus, EncodedCorpus 또는 문장 리스트
+    :return: corpus 의 fingerprint(). fingerprint() 가 없으면 문장 내용의 hash
+    """
+    if hasattr(sentences, 'fingerprint'):
+        return sentences.fingerprint()
+    return sentences_digest(sentences)
+
+
+def make_token_cache(cache_dir=TOKEN_CACHE_PATH, tokenizer=DEFAULT_TOKENIZER):
+    """
+    :param cache_dir: 캐시 경로
+    :param tokenizer: 형태소 분석기 이름
+    :return: 해당 형태소 분석기 / 품사 필터에 맞는 TokenCache
+    """
+    backend = get_tokenizer(tokenizer)
+    return TokenCache(cache_dir, backend.name, backend.version, (NOUN_TAG_PREFIX,) + VOCAB_TAGS)
+
+
+def compression(path):
+    """
+    :param path: 파일 경로
+    :return: 압축 형식 ('gzip', 'bz2', 'xz'). 압축 파일이 아니면 None
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension in COMPRESSION_EXTENSIONS:
+        return COMPRESSION_EXTENSIONS[extension]
+
+    with open(path, 'rb') as fp:
+        magic = fp.read(6)
+
+    for name, prefix in COMPRESSION_MAGIC:
+        if magic.startswith(prefix):
+            return name
+
+    return None
+
+
+def open_train_file(path):
+    """
+    압축 파일이면 풀어서 읽는 file 객체를 반환함. 파일 전체를 풀지 않고 읽는 만큼만 풀어냄.
+    (offset 은 압축을 푼 내용 기준)
+
+    :param path: 파일 경로
+    :return: binary 모드 file 객체
+    """
+    name = compression(path)
+
+    if name == 'gzip':
+        return gzip.open(path, 'rb')
+    if name == 'bz2':
+        return bz2.open(path, 'rb')
+    if name == 'xz':
+        return lzma.open(path, 'rb')
+
+    return open(path, 'rb')
+
+
+def iter_lines(path, start=0, end=None):
+    """
+    :param path: 파일 경로
+    :param start: 읽기 시작할 byte offset
+    :param end: 읽기를 멈출 byte offset. None 이면 파일 끝까지
+    :return: (byte offset, 줄) 을 빈 줄을 제외하고 하나씩 반환하는 generator
+    """
+    offset = start
+    with open_train_file(path) as fp:
+        if start:
+            fp.seek(start)
+        for raw_line in fp:
+            if end is not None and offset >= end:
+                break
+            if raw_line.strip():
+                yield offset, raw_line.decode('utf-8')
+            offset += len(raw_line)
+
+
+def iter_line_batches(path, start=0, end=None, batch_lines=None, max_batch_bytes=None):
+    """
+    파일 전체를 읽지 않고 정해진 크기의 줄 묶음 단위로 읽음.
+    묶음에 담긴 줄 수가 batch_lines 이거나 크기가 max_batch_bytes 를 넘으면 바로 내보냄.
+
+    :param path: 파일 경로
+    :param start: 읽기 시작할 byte offset
+    :param end: 읽기를 멈출 byte offset. None 이면 파일 끝까지
+    :param batch_lines: 묶음 하나의 최대 줄 수. None 이면 BATCH_LINES
+    :param max_batch_bytes: 묶음 하나의 최대 크기 (byte, 대략적인 메모리 상한). None 이면 MAX_BATCH_BYTES
+    :return: 줄 리스트 generator
+    """
+    if batch_lines is None:
+        batch_lines = BATCH_LINES
+    if max_batch_bytes is None:
+        max_batch_bytes = MAX_BATCH_BYTES
+
+    batch = list()
+    batch_bytes = 0
+
+    for _, line in iter_lines(path, start, end):
+        batch.append(line)
+        batch_bytes += len(line.encode('utf-8'))
+
+        if len(batch) >= batch_lines or batch_bytes >= max_batch_bytes:
+            yield batch
+            batch = list()
+            batch_bytes = 0
+
+    if batch:
+        yield batch
+
+
 class MakeSentence:
-    def search(self, dirname, file_list=list()):
+    def search(self, dirname, file_list=None):
         """
         :param file_list: 저장된 모든 파일 리스트
         :param dirname: 경로
         :return: 해당 경로 속 모든 파일 리스트
         """
+        if file_list is None:
+            # 기본값을 list() 로 두면 MakeSentence 객체끼리 같은 리스트를 공유하게 됨
+            file_list = list()
 
         try:
-            filenames = os.listdir(dirname)
+            # os.listdir 순서는 파일 시스템마다 다르므로 정렬해서 문장 순서, dedup 결과, ModelStore key 를 고정함
+            filenames = sorted(os.listdir(dirname))
             for filename in filenames:
+                if filename.startswith('.'):
+                    # manifest 등 숨김 파일은 학습 데이터가 아님
+                    continue
                 full_filename = os.path.join(dirname, filename)
                 if os.path.isdir(full_filename):
                     # 재귀 형식을 이용해 해당 경로의 하위경로 파일까지 긁어옴
@@ -68,31 +471,295 @@ class MakeSentence:
 
         return file_list
 
-    def make_sentences(self):
-        sentences = list()
-        for train_file in self.all_files:
-            with open(os.path.join(self.datapath, train_file), 'r') as fp:
-                sentences += [mecab.nouns(line) for line in fp.readlines() if line != '\n']
-        return sentences
+    def tokenize_paths(self, paths):
+        """
+        :param paths: 형태소 분석할 파일 경로 리스트
+        :return: 파일 순서대로 (파일 경로, 문장 리스트, NNG/NNP 명사 리스트) generator
+        """
+        if self.workers > 1 and paths:
+            return tokenize_parallel(paths, self.workers, memory_report=self.memory_report, tokenizer=self.tokenizer,
+                                     max_batch_bytes=self.max_batch_bytes)
 
-    def make_vocab(self):
-        all_vocab = list()
+        if self.memory_report is not None:
+            return self.tokenize_profiled(paths)
+
+        return ((path,) + tokenize_file(path, tokenizer=self.tokenizer, max_batch_bytes=self.max_batch_bytes)
+                for path in paths)
+
+    def tokenize_profiled(self, paths):
+        """
+        파일마다 형태소 분석 중 최대 메모리를 재서 self.memory_report 에 기록함.
+
+        :param paths: 형태소 분석할 파일 경로 리스트
+        :return: 파일 순서대로 (파일 경로, 문장 리스트, NNG/NNP 명사 리스트) generator
+        """
+        for path in paths:
+            (sentences, vocab_doc), self.memory_report[path] = measure_peak_memory(tokenize_file, path, 0, None,
+                                                                                   self.tokenizer, self.max_batch_bytes)
+            yield path, sentences, vocab_doc
+
+    def tokenize_cached(self, paths, digests=None):
+        """
+        캐시에 있는 파일은 Mecab 을 거치지 않고, 없는 파일만 분석한 뒤 캐시에 저장함.
+
+        :param paths: 형태소 분석할 파일 경로 리스트
+        :param digests: 미리 계산한 파일 hash 리스트. None 이면 새로 계산
+        :return: 파일 순서대로 (파일 경로, 문장 리스트, NNG/NNP 명사 리스트) generator
+        """
+        if digests is None:
+            digests = [None] * len(paths)
+
+        keys = [self.cache.key(path, digest) for path, digest in zip(paths, digests)]
+
+        # 캐시 내용은 내보낼 차례에 하나씩 읽고, 새로 분석한 결과도 내보낼 때까지만 들고 있음.
+        # (전체 corpus 의 문장 리스트를 한꺼번에 메모리에 올리지 않음)
+        missing = [path for path, key in zip(paths, keys) if key not in self.cache]
+        self.cache.misses += len(missing)
+        fresh = iter(self.tokenize_paths(missing))
+        missing = set(missing)
+
+        for path, key in zip(paths, keys):
+            if path in missing:
+                _, sentences, vocab_doc = next(fresh)
+                result = (sentences, vocab_doc)
+                self.cache.store(key, result)
+                yield path, sentences, vocab_doc
+                continue
+
+            result = self.cache.load(key)
+            if result is None:
+                # 확인한 뒤에 지워졌거나 깨진 캐시
+                result = tokenize_file(path, tokenizer=self.tokenizer, max_batch_bytes=self.max_batch_bytes)
+                self.cache.store(key, result)
+            yield (path,) + tuple(result)
+
+    def tokenize_incremental(self, paths):
+        """
+        manifest 와 비교해서 추가 / 수정된 파일만 분석하고, 나머지는 캐시에서 읽음.
+        (크기와 mtime 이 그대로인 파일은 hash 도 다시 계산하지 않음)
+
+        :param paths: 형태소 분석할 파일 경로 리스트
+        :return: 파일 순서대로 (파일 경로, 문장 리스트, NNG/NNP 명사 리스트) generator
+        """
+        self.delta = self.manifest.update(paths)
+
+        for path, sentences, vocab_doc in self.tokenize_cached(paths, [self.manifest.digest(path) for path in paths]):
+            self.manifest.set_sentence_count(path, len(sentences))
+            yield path, sentences, vocab_doc
+
+        self.manifest.save()
+
+    def tokenize_files(self):
+        """
+        :return: 파일 순서대로 (파일 경로, 문장 리스트, NNG/NNP 명사 리스트) generator
+        """
+        paths = [os.path.join(self.datapath, train_file) for train_file in self.all_files]
+
+        if self.manifest is not None:
+            return self.tokenize_incremental(paths)
+
+        if self.cache is None:
+            return self.tokenize_paths(paths)
 
-        for train_file in self.all_files:
-            with open(os.path.join(self.datapath, train_file), 'r') as fp:
-                all_vocab.append([pos[0] for pos in mecab.pos(fp.read()) if pos[1] in ['NNG', 'NNP']])
+        return self.tokenize_cached(paths)
 
-        return all_vocab
+    def tokenize_unique_files(self):
+        """
+        dedup 모드일 경우 같거나 거의 같은 연설 파일을 빼고 먼저 나온 파일만 남김.
+        버린 파일은 self.dedup_report 에 DuplicateRecord 로 기록함.
+
+        :return: 파일 순서대로 (파일 경로, 문장 리스트, NNG/NNP 명사 리스트) iterable
+        """
+        if not self.dedup:
+            return self.tokenize_files()
+
+        results = list(self.tokenize_files())
+        from dedup import deduplicate
+
+        kept, report = deduplicate([(os.path.relpath(path, self.datapath), file_sentences)
+                                    for path, file_sentences, _ in results], self.dedup_threshold)
+        self.dedup_report = report
+
+        return [results[index] for index in kept]
+
+    def tokenize(self):
+        """
+        모든 파일을 한 번씩만 형태소 분석해서 문장과 vocab 을 같이 만듦.
+
+        :return: (모든 문장 리스트, 파일별 NNG/NNP 명사 리스트)
+                 compact 모드일 경우 같은 Vocabulary 를 공유하는 EncodedCorpus 두 개
+        """
+        if self.compact:
+            vocabulary = Vocabulary()
+            sentences = EncodedCorpus(vocabulary)
+            all_vocab = EncodedCorpus(vocabulary)
+        else:
+            sentences = list()
+            all_vocab = list()
+
+        for _, file_sentences, vocab_doc in self.tokenize_unique_files():
+            sentences.extend(file_sentences)
+            all_vocab.append(vocab_doc)
+
+        return sentences, all_vocab
+
+    def make_sentences(self):
+        return self.tokenize()[0]
 
-    def __init__(self, datapath):
+    def make_vocab(self):
+        return self.tokenize()[1]
+
+    def __init__(self, datapath, stream=False, workers=1, cache_dir=None, manifest=False, compact=False,
+                 profile_memory=False, dedup=False, dedup_threshold=None, tokenizer=DEFAULT_TOKENIZER,
+                 max_batch_bytes=None):
         """
         :param datapath: 학습할 데이터가 있는 경로
+        :param stream: True 일 경우 문장을 메모리에 올리지 않고 epoch 마다 파일에서 다시 읽어 형태소 분석
+        :param workers: 형태소 분석에 사용할 프로세스 수. 1 이면 현재 프로세스에서 분석
+        :param cache_dir: 형태소 분석 결과 캐시 경로. None 이면 캐시를 사용하지 않음
+        :param manifest: True 일 경우 datapath 의 manifest 와 비교해서 바뀐 파일만 다시 분석함.
+                         (cache_dir 이 없으면 기본 캐시 경로를 사용)
+        :param compact: True 일 경우 문장을 str 리스트 대신 int32 id 배열 (EncodedCorpus) 로 저장
+        :param profile_memory: True 일 경우 형태소 분석한 파일마다 최대 메모리를 self.memory_report 에 기록
+        :param dedup: True 일 경우 같거나 거의 같은 (MinHash 유사도 dedup_threshold 이상) 연설 파일을 학습에서 뺌
+        :param dedup_threshold: 중복으로 볼 추정 Jaccard 유사도. None 이면 dedup.DEFAULT_THRESHOLD
+        :param tokenizer: 형태소 분석기 이름 (tokenizer.TOKENIZERS 의 key. 'mecab', 'regex')
+        :param max_batch_bytes: 한 번에 형태소 분석할 줄 묶음의 최대 크기 (byte). 분석 중 메모리 상한을 정함.
+                                None 이면 MAX_BATCH_BYTES
         :return: 해당 경로에 있는 모든 파일의 학습 데이터
         """
+        if stream:
+            # stream 모드는 epoch 마다 파일을 다시 읽어 분석하므로 파일 단위 처리 옵션을 적용할 수 없음
+            unsupported = [option for option, value in (('workers', workers > 1), ('cache_dir', cache_dir is not None),
+                                                        ('manifest', manifest), ('compact', compact),
+                                                        ('profile_memory', profile_memory), ('dedup', dedup))
+                           if value]
+            if unsupported:
+                raise ValueError("stream=True does not support %s" % ", ".join(unsupported))
+
         self.datapath = datapath
         self.all_files = self.search(datapath)
-        self.sentences = self.make_sentences()
-        self.vocab = self.make_vocab()
+        self.stream = stream
+        self.workers = workers
+        self.compact = compact
+        self.tokenizer = tokenizer
+        self.max_batch_bytes = max_batch_bytes
+        # {파일 경로: 형태소 분석 중 최대 메모리 (byte)}. 캐시에서 읽은 파일은 포함되지 않음
+        self.memory_report = dict() if profile_memory else None
+        self.dedup = dedup
+        self.dedup_threshold = dedup_threshold
+        # dedup 으로 버린 파일 목록 (DuplicateRecord 리스트)
+        self.dedup_report = list()
+        # prune() 에 넘긴 (min_count, stop_nouns, max_vocab). fingerprint 에 들어감
+        self.pruned = None
+
+        if manifest and cache_dir is None:
+            cache_dir = TOKEN_CACHE_PATH
+        self.cache = None if cache_dir is None else make_token_cache(cache_dir, tokenizer)
+        self.manifest = CorpusManifest.load(datapath) if manifest else None
+        # manifest 를 사용할 때 마지막 빌드에서 바뀐 파일 목록 (ManifestDelta)
+        self.delta = None
+
+        if stream:
+            self.sentences = SentenceStream([os.path.join(datapath, f) for f in self.all_files], tokenizer,
+                                            max_batch_bytes)
+            self.vocab = VocabStream([os.path.join(datapath, f) for f in self.all_files], tokenizer, max_batch_bytes)
+        else:
+            self.sentences, self.vocab = self.tokenize()
+
+    def prune(self, min_count=MIN_COUNT, stop_nouns=STOP_NOUNS, max_vocab=None):
+        """
+        학습 전에 드물게 나온 명사, 불용 명사를 지워서 gensim 이 학습할 때 건너뛸 token 을 미리 없앰.
+        단어 수는 한 번만 셈. (compact 모드면 numpy.bincount)
+        이 객체의 sentences 와 vocab 을 가지치기한 EncodedCorpus 로 바꿈.
+
+        :param min_count: 이보다 적게 나온 명사는 지움 (TrainModel 의 min_count 와 같게)
+        :param stop_nouns: 지울 명사 목록
+        :param max_vocab: 남길 최대 명사 수 (많이 나온 순). None 이면 제한 없음
+        :return: self
+        """
+        vocabulary = select_vocabulary(count_words(self.sentences), min_count, stop_nouns, max_vocab)
+
+        self.sentences = prune_corpus(self.sentences, vocabulary)
+        self.vocab = prune_corpus(self.vocab, vocabulary)
+        self.stream = False
+        self.compact = True
+        self.pruned = (min_count, sorted(stop_nouns), max_vocab)
+
+        return self
+
+    def fingerprint(self):
+        """
+        학습 파일 내용 (파일 순서대로), 형태소 분석기 이름 / 버전, 품사 필터, dedup / prune 설정의 hash.
+        파일 경로나 mtime 은 들어가지 않으므로 내용이 같으면 같은 값이 나옴. (ModelStore key 에 사용)
+        load() 로 읽은 corpus 처럼 원본 파일이 없으면 문장 내용의 hash.
+
+        :return: sha1 hex digest
+        """
+        if not self.all_files:
+            return sentences_digest(chain(self.sentences, [['']], self.vocab))
+
+        paths = [os.path.join(self.datapath, train_file) for train_file in self.all_files]
+        if self.manifest is not None and self.delta is not None:
+            # 이번 빌드에서 manifest 가 이미 계산한 hash
+            digests = [self.manifest.digest(path) for path in paths]
+        else:
+            digests = [file_digest(path) for path in paths]
+
+        backend = get_tokenizer(self.tokenizer)
+        state = {'files': digests, 'tokenizer': [backend.name, backend.version],
+                 'tags': (NOUN_TAG_PREFIX,) + VOCAB_TAGS, 'dedup': [self.dedup, self.dedup_threshold],
+                 'pruned': self.pruned}
+
+        return hashlib.sha1(json.dumps(state, sort_keys=True).encode('utf-8')).hexdigest()
+
+    def save(self, path):
+        """
+        형태소 분석 결과를 mmap 으로 읽을 수 있는 token id 파일로 저장함.
+        (path.sentences.*, path.vocab.*, path.words)
+
+        :param path: 저장할 경로 (확장자 제외)
+        :return: 저장한 경로
+        """
+        vocabulary = save_corpus(self.sentences, path + '.sentences', save_vocabulary=False)
+        save_corpus(self.vocab, path + '.vocab', vocabulary, save_vocabulary=False)
+        vocabulary.save(path + '.words')
+
+        return path
+
+    @classmethod
+    def load(cls, path, datapath=None, mmap=True):
+        """
+        save() 로 저장한 corpus 를 형태소 분석 없이 읽음.
+        mmap 으로 읽으면 여러 학습 프로세스가 같은 page cache 를 공유함.
+
+        :param path: save() 에 넘긴 경로
+        :param datapath: 원본 학습 데이터 경로 (TrainModel 이름으로 사용). None 이면 path
+        :param mmap: False 일 경우 메모리로 복사해서 읽음
+        :return: MakeSentence
+        """
+        vocabulary = Vocabulary.load(path + '.words')
+
+        corpus = cls.__new__(cls)
+        corpus.datapath = path if datapath is None else datapath
+        corpus.all_files = list()
+        corpus.stream = False
+        corpus.workers = 1
+        corpus.compact = True
+        corpus.tokenizer = DEFAULT_TOKENIZER
+        corpus.max_batch_bytes = None
+        corpus.memory_report = None
+        corpus.dedup = False
+        corpus.dedup_threshold = None
+        corpus.dedup_report = list()
+        corpus.pruned = None
+        corpus.cache = None
+        corpus.manifest = None
+        corpus.delta = None
+        corpus.sentences = EncodedCorpus.load(path + '.sentences', vocabulary, mmap)
+        corpus.vocab = EncodedCorpus.load(path + '.vocab', vocabulary, mmap)
+
+        return corpus
 
     def __len__(self):
         return len(self.sentences)
@@ -100,71 +767,431 @@ class MakeSentence:
     def __getitem__(self, index):
         return self.sentences[index]
 
+    def __iter__(self):
+        return iter(self.sentences)
+
+    def iter_from(self, start):
+        """
+        :param start: 시작할 문장 번호
+        :return: start 번째 문장부터 반환하는 iterator. stream 이면 앞 문장을 형태소 분석하지 않음
+        """
+        if isinstance(self.sentences, SentenceStream):
+            return self.sentences.iter_from(start)
+        return islice(self.sentences, start, None)
+
     def __repr__(self):
         return "TrainData: \n%s" % ("\n".join([str(sentence) for sentence in self.sentences]))
 
     def __add__(self, other):
-        self.sentences += other.sentences
-        return self
+        """
+        :param other: MakeSentence 또는 ChainedCorpus
+        :return: 두 corpus 를 복사하지 않고 이어붙인 ChainedCorpus (self, other 는 바뀌지 않음)
+        """
+        return ChainedCorpus([self, other])
+
+
+EpochReport = namedtuple('EpochReport', ['epoch', 'seconds', 'words', 'words_per_second', 'cpu_utilization'])
 
 
 class TrainModel:
-    def __init__(self, train_data, name=None):
+    def __init__(self, train_data, name=None, size=3, window=5, min_count=MIN_COUNT, workers=3, iter=5, sg=0,
+                 checkpoint_dir=None, checkpoint_every=CHECKPOINT_SENTENCES, store=None, mmap=False, vectors=None):
         """
         :param train_data: TrainData object or saved model path
+        :param size: 단어 벡터 차원 (visualization_3d 는 3 차원만 그릴 수 있음)
+        :param window: 문맥으로 볼 앞뒤 단어 수
+        :param min_count: 이보다 적게 나온 단어는 학습하지 않음
+        :param workers: 학습 thread 수
+        :param iter: epoch 수
+        :param sg: 1 이면 skip-gram, 0 이면 CBOW
+        :param checkpoint_dir: 학습 중간 상태를 저장할 경로. 중단되면 TrainModel.resume 으로 이어서 학습
+        :param checkpoint_every: 몇 문장을 학습할 때마다 checkpoint 를 저장할지
+        :param store: ModelStore. 같은 corpus / hyper-parameter 로 학습한 모델이 있으면 다시 학습하지 않고 읽음
+        :param mmap: 저장된 모델 (path 또는 store) 을 읽을 때 벡터를 읽기 전용 mmap 으로 읽음.
+                     같은 모델을 읽는 프로세스끼리 벡터를 공유함 (학습은 할 수 없음)
+        :param vectors: 저장된 모델을 읽을 때 most_similar 에 사용할 벡터 형식 ('float32', 'float16', 'int8', 'pq').
+                        save(vector_dtypes=...) 로 같이 저장한 파일을 mmap 으로 읽음. None 이면 mmap 일 때만 float32
         :return: Trained Vector Model
         """
 
-        self.model = Word2Vec(min_count=20, size=3)
+        from gensim.models import Word2Vec
+
+        # epoch 은 train_epochs 에서 하나씩 돌리면서 시간을 잼
+        self.model = Word2Vec(size=size, window=window, min_count=min_count, workers=workers, iter=1, sg=sg)
+        self.workers = workers
+        self.epochs = iter
+        # 마지막 학습의 epoch 별 EpochReport 리스트
+        self.epoch_reports = list()
+        self.checkpoint_dir = checkpoint_dir
+        self.checkpoint_every = checkpoint_every
+        # 결과에 영향을 주는 hyper-parameter (ModelStore key 에 들어감. workers 는 제외)
+        self.params = {'size': size, 'window': window, 'min_count': min_count, 'iter': iter, 'sg': sg}
+        self.store = store
+        self.key = None
+        # path 에서 읽은 모델이면 그 경로. model_key() 가 필요할 때 파일 hash 를 계산함
+        self.model_path = None
+        # store 에서 읽은 모델이면 True
+        self.cached = False
+        # mmap 으로 읽은 경우 프로세스끼리 공유하는 VectorTable
+        self.shared_vectors = None
+
+        if isinstance(train_data, str):
+            # train_data 가 path 로 왔을 경우.
+            self.name = train_data if name is None else name
+            self.load_model(train_data, mmap, vectors)
+            self.model_path = train_data
 
-        try:
-            if name is None:
-                self.name = train_data.datapath
+        else:
+            self.name = train_data.datapath if name is None else name
+            self.sentences = train_data
+
+            model_path = None if store is None else store.lookup(self.model_key())
+            if model_path is not None:
+                self.load_model(model_path, mmap, vectors)
+                self.cached = True
             else:
-                self.name = name
+                self.model.build_vocab(self.sentences.vocab)
+                self.train_epochs(self.sentences)
 
-        except AttributeError:
-            # train_data 가 path 로 왔을 경우.
-            self.model.load(train_data)
+                if store is not None:
+                    store.store(self.model_key(), self, self.meta())
+
+        self.reset_vocab_index()
+
+    def load_model(self, path, mmap=False, vectors=None):
+        """
+        :param path: 저장된 gensim 모델 경로
+        :param mmap: True 일 경우 모델의 큰 배열을 읽기 전용 mmap 으로 읽고,
+                     most_similar 는 save() 때 모델 옆에 저장한 정규화 벡터 파일을 mmap 해서 계산함.
+                     (gensim 은 most_similar 할 때 정규화 행렬을 프로세스마다 새로 만듦)
+        :param vectors: most_similar 에 사용할 벡터 형식. 'float16', 'int8', 'pq' 면 양자화된 행렬로 계산함
+        """
+        from gensim.models import Word2Vec
+
+        if not mmap and vectors is None:
+            self.model = Word2Vec.load(path)
+            return
+
+        from vectors import load_shared
+
+        self.model = Word2Vec.load(path, mmap='r')
+        self.shared_vectors = load_shared(path, vectors or 'float32')
+
+    def train_epochs(self, sentences, epochs=None, start_epoch=0, start_position=0):
+        """
+        epoch 을 하나씩 학습하면서 epoch 별 시간, 초당 단어 수, CPU 사용률을 self.epoch_reports 에 기록함.
+        학습률은 전체 epoch 에 걸쳐 alpha -> min_alpha 로 선형으로 줄어듦.
+        checkpoint_dir 이 있으면 checkpoint_every 문장마다 checkpoint 를 저장함.
+
+        :param sentences: 학습할 문장 iterable
+        :param epochs: epoch 수. None 이면 생성할 때 넘긴 iter
+        :param start_epoch: 이어서 학습할 epoch (0 부터)
+        :param start_position: start_epoch 에서 이어서 학습할 문장 위치
+        :return: 학습한 전체 단어 수
+        """
+        if epochs is None:
+            epochs = self.epochs
+
+        start_alpha, end_alpha = self.model.alpha, self.model.min_alpha
+        # build_vocab 은 vocab 문서 수를 corpus 크기로 기록하므로 실제 문장 수를 넘겨 학습률을 맞춤
+        total_examples = len(sentences)
+        total_steps = max(epochs * total_examples, 1)
+        self.epoch_reports = list()
+        # checkpoint 를 다른 corpus 로 이어서 학습하지 않도록 checkpoint 에 같이 저장함
+        corpus = corpus_fingerprint(sentences) if self.checkpoint_dir is not None else None
+
+        for epoch in range(start_epoch, epochs):
+            wall_start, cpu_start = time.perf_counter(), time.process_time()
+            words = 0
+
+            position = start_position if epoch == start_epoch else 0
+            for position, segment, count in self.iter_segments(sentences, position, total_examples):
+                done = epoch * total_examples + position
+                self.model.alpha = start_alpha - (start_alpha - end_alpha) * done / total_steps
+                self.model.min_alpha = start_alpha - (start_alpha - end_alpha) * (done + count) / total_steps
+
+                words += self.model.train(segment, total_examples=count) or 0
 
+                if self.checkpoint_dir is not None:
+                    self.save_checkpoint(sentences, corpus, epochs, epoch, position + count, start_alpha, end_alpha)
+
+            seconds = max(time.perf_counter() - wall_start, 1e-9)
+            # 학습 thread 들이 사용한 CPU 시간 / (경과 시간 * thread 수)
+            cpu_utilization = (time.process_time() - cpu_start) / seconds / self.workers
+
+            self.epoch_reports.append(EpochReport(epoch + 1, seconds, words, words / seconds, cpu_utilization))
+
+        self.model.alpha, self.model.min_alpha = start_alpha, end_alpha
+
+        return sum(report.words for report in self.epoch_reports)
+
+    def iter_segments(self, sentences, start, total_examples):
+        """
+        :param sentences: 학습할 문장 iterable
+        :param start: 건너뛸 문장 수 (checkpoint 에서 이어서 학습할 때)
+        :param total_examples: 전체 문장 수
+        :return: (시작 위치, 학습할 문장들, 문장 수) generator.
+                 checkpoint 를 저장하지 않으면 corpus 전체를 한 번에 넘김
+        """
+        if self.checkpoint_dir is None and start == 0:
+            yield 0, sentences, total_examples
+            return
+
+        if hasattr(sentences, 'iter_from'):
+            # 이미 학습한 문장은 형태소 분석하지 않고 건너뜀
+            iterator = sentences.iter_from(start)
         else:
-            self.sentences = train_data
+            iterator = iter(sentences)
+            # 이미 학습한 문장은 버림
+            deque(islice(iterator, start), maxlen=0)
+
+        position = start
+        while True:
+            segment = list(islice(iterator, self.checkpoint_every))
+            if not segment:
+                return
+            yield position, segment, len(segment)
+            position += len(segment)
+
+    def save_checkpoint(self, sentences, corpus, epochs, epoch, position, start_alpha, end_alpha):
+        """
+        모델과 학습 위치 (epoch, 문장 위치, 학습률 범위), 학습 중인 corpus 의 fingerprint 를 checkpoint_dir 에 저장함.
+        새 checkpoint 를 다 쓴 다음에 latest 를 바꾸므로 저장 중에 죽어도 이전 checkpoint 는 남음.
+        """
+        if position >= len(sentences):
+            epoch, position = epoch + 1, 0
+
+        name = "checkpoint-%d-%d" % (epoch, position)
+        os.makedirs(os.path.join(self.checkpoint_dir, name), exist_ok=True)
+        self.model.save(os.path.join(self.checkpoint_dir, name, 'model'))
+
+        state = {'model': os.path.join(name, 'model'), 'epoch': epoch, 'position': position, 'epochs': epochs,
+                 'start_alpha': start_alpha, 'end_alpha': end_alpha, 'name': self.name, 'workers': self.workers,
+                 'checkpoint_every': self.checkpoint_every, 'params': self.params, 'key': self.model_key(),
+                 'corpus': corpus}
+
+        latest = os.path.join(self.checkpoint_dir, CHECKPOINT_STATE)
+        tmp_path = "%s.%d.tmp" % (latest, os.getpid())
+        with open(tmp_path, 'w', encoding='utf-8') as fp:
+            json.dump(state, fp, ensure_ascii=False, indent=1)
+        os.replace(tmp_path, latest)
+
+        # 이전 checkpoint 는 지움
+        for filename in os.listdir(self.checkpoint_dir):
+            if filename.startswith('checkpoint-') and filename != name:
+                shutil.rmtree(os.path.join(self.checkpoint_dir, filename), ignore_errors=True)
+
+    @classmethod
+    def resume(cls, checkpoint_dir, train_data):
+        """
+        중단된 학습을 마지막 checkpoint 에서 이어서 학습함.
+
+        :param checkpoint_dir: 학습할 때 넘긴 checkpoint_dir
+        :param train_data: 학습할 때 넘긴 것과 같은 MakeSentence (같은 순서의 문장)
+        :return: 학습이 끝난 TrainModel
+        """
+        from gensim.models import Word2Vec
+
+        with open(os.path.join(checkpoint_dir, CHECKPOINT_STATE), 'r', encoding='utf-8') as fp:
+            state = json.load(fp)
+
+        # 문장 위치는 checkpoint 를 저장한 corpus 에서만 의미가 있음
+        if corpus_fingerprint(train_data) != state['corpus']:
+            raise ValueError("%s: checkpoint was saved while training a different corpus (or a different order)"
+                             % checkpoint_dir)
+
+        trained = cls.__new__(cls)
+        trained.model = Word2Vec.load(os.path.join(checkpoint_dir, state['model']))
+        trained.name = state['name']
+        trained.workers = state['workers']
+        trained.epochs = state['epochs']
+        trained.epoch_reports = list()
+        trained.checkpoint_dir = checkpoint_dir
+        trained.checkpoint_every = state['checkpoint_every']
+        trained.params = state['params']
+        trained.store = None
+        trained.key = state['key']
+        trained.model_path = None
+        trained.cached = False
+        trained.shared_vectors = None
+        trained.sentences = train_data
+
+        trained.model.alpha, trained.model.min_alpha = state['start_alpha'], state['end_alpha']
+        trained.train_epochs(train_data, state['epochs'], state['epoch'], state['position'])
+
+        trained.reset_vocab_index()
+
+        return trained
+
+    def training_summary(self):
+        """
+        :return: 마지막 학습의 epoch 별 시간 / 초당 단어 수 / CPU 사용률 요약 문자열
+        """
+        lines = ["%-6s %9s %12s %12s %6s" % ('epoch', 'seconds', 'words', 'words/s', 'cpu')]
+        for report in self.epoch_reports:
+            lines.append("%-6d %8.2fs %12d %12.0f %5.0f%%" % (report.epoch, report.seconds, report.words,
+                                                             report.words_per_second,
+                                                             report.cpu_utilization * 100))
 
-            self.model.build_vocab(self.sentences.vocab)
-            self.model.train(self.sentences)
+        seconds = sum(report.seconds for report in self.epoch_reports)
+        words = sum(report.words for report in self.epoch_reports)
+        if seconds:
+            cpu = sum(report.cpu_utilization * report.seconds for report in self.epoch_reports) / seconds
+            lines.append("%-6s %8.2fs %12d %12.0f %5.0f%% (%d workers)" % ('total', seconds, words, words / seconds,
+                                                                          cpu * 100, self.workers))
 
-        self.sorted_vocab = sorted(list(self.model.vocab.items()), key=lambda x: x[1].count, reverse=True)
+        return "\n".join(lines)
 
     def most_similar(self, *args, **kwargs):
         """
         :param args, kwargs:
         :return:
         """
+        if self.shared_vectors is not None:
+            return self.shared_vectors.most_similar(*args, **kwargs)
         return self.model.most_similar(*args, **kwargs)
 
-    def save(self):
+    def model_key(self):
+        """
+        :return: 학습 corpus 의 fingerprint 와 hyper-parameter, gensim 버전으로 만든 ModelStore key.
+                 path 에서 읽은 모델이면 모델 파일의 hash
+        """
+        if self.key is None and self.model_path is not None:
+            self.key = file_digest(self.model_path)
+
+        if self.key is None:
+            from gensim import __version__ as gensim_version
+
+            self.key = ModelStore.key(corpus_fingerprint(self.sentences), dict(self.params, gensim=gensim_version))
+
+        return self.key
+
+    def meta(self):
+        """
+        :return: ModelStore 에 모델과 함께 저장할 정보
+        """
+        return {'name': self.name, 'params': self.params}
+
+    def save(self, path=None, vector_dtypes=()):
         """
+        :param path: 저장할 경로. None 이면 ModelStore (self.store, 없으면 MODEL_STORE_PATH) 에 key 로 저장.
+                     입력이 같은 모델은 같은 곳에 저장되므로 중복 파일이 생기지 않음
+        :param vector_dtypes: 모델 옆에 같이 저장할 양자화 벡터 형식 ('float16', 'int8', 'pq').
+                              TrainModel(path, vectors=dtype) 로 읽음
         :return: moodel 이 저장된 경로
         """
-        filename = randomkey(24)
-        filepath = os.path.dirname(os.path.realpath(__file__))
+        if path is None:
+            store = self.store if self.store is not None else ModelStore(MODEL_STORE_PATH)
+            key = self.model_key()
+            if key in store:
+                path = store.model_path(key)
+            else:
+                path = store.store(key, self, self.meta(), vector_dtypes=vector_dtypes)
+
+            # 이미 저장된 모델 (또는 다른 프로세스가 먼저 저장한 모델) 에는 없는 형식만 추가함
+            self.add_vectors(path, vector_dtypes)
+            return path
 
-        path = os.path.join(filepath, filename)
+        from vectors import save_shared, vectors_path
 
         self.model.save(path)
+        # mmap 으로 읽는 쪽 (load_shared) 이 모델 경로에 파일을 쓰지 않도록 정규화 벡터도 같이 저장
+        save_shared(self.model, path)
+        for dtype in vector_dtypes:
+            self.export_vectors(vectors_path(path, dtype), dtype)
 
         return path
 
+    def add_vectors(self, path, vector_dtypes):
+        """
+        저장된 모델 옆에 아직 없는 형식의 벡터 파일만 추가함.
+        임시 이름으로 export 한 뒤 파일마다 rename 하고, load_shared 가 존재 여부를 보는 .words 를 마지막에 옮김.
+
+        :param path: 저장된 모델 경로
+        :param vector_dtypes: 추가할 벡터 형식 ('float16', 'int8', 'pq')
+        """
+        from vectors import vectors_path
+
+        for dtype in vector_dtypes:
+            target = vectors_path(path, dtype)
+            if os.path.exists(target + '.words'):
+                continue
+
+            tmp_path = "%s.%d.tmp" % (target, os.getpid())
+            self.export_vectors(tmp_path, dtype)
+
+            dirname, prefix = os.path.split(tmp_path)
+            suffixes = [filename[len(prefix):] for filename in os.listdir(dirname) if filename.startswith(prefix)]
+            for suffix in sorted(suffixes, key=lambda suffix: suffix == '.words'):
+                os.replace(tmp_path + suffix, target + suffix)
+
+    def reset_vocab_index(self):
+        """
+        vocab 이 바뀌었을 때 빈도순 정렬 결과를 버림. 정렬은 실제로 필요할 때 함.
+        """
+        # 전체 빈도순 (단어, Vocab) 리스트. sorted_vocab 을 처음 읽을 때 만듦
+        self._sorted_vocab = None
+        # heap 으로 고른 상위 빈도 (단어, Vocab) 리스트
+        self._top_vocab = list()
+
+    @property
+    def sorted_vocab(self):
+        """
+        :return: 빈도순으로 정렬한 (단어, Vocab) 리스트.
+                 count 배열을 numpy argsort (stable) 로 한 번 정렬함 (빈도가 같으면 vocab 순서)
+        """
+        if self._sorted_vocab is None:
+            from numpy import argsort, fromiter, int64
+
+            items = list(self.model.vocab.items())
+            counts = fromiter((vocab.count for _, vocab in items), dtype=int64, count=len(items))
+            self._sorted_vocab = [items[i] for i in argsort(-counts, kind='stable')]
+            self._top_vocab = list()
+
+        return self._sorted_vocab
+
+    def top_vocab(self, n):
+        """
+        :param n: 단어 수
+        :return: 가장 많이 나온 n 개의 (단어, Vocab) 리스트. 전체를 정렬하지 않고 heap 으로 고름
+        """
+        if self._sorted_vocab is not None:
+            return self._sorted_vocab[:n]
+
+        if len(self._top_vocab) < min(n, len(self)):
+            self._top_vocab = heapq.nlargest(n, self.model.vocab.items(), key=lambda x: x[1].count)
+
+        return self._top_vocab[:n]
+
     def __len__(self):
-        return len(self.sorted_vocab)
+        return len(self.model.vocab)
 
     def __getitem__(self, index):
         """
         :param index: list index
         :return: 해당 index 의 sorted_vocab data return.
+                 앞쪽 (TOP_VOCAB_LIMIT 이내) index 는 전체를 정렬하지 않고 heap 으로 찾음
         """
+        if self._sorted_vocab is None:
+            if isinstance(index, slice):
+                # index.indices 로 음수 / 역방향 slice 도 실제 범위로 바꾼 뒤, 가장 뒤 위치까지만 heap 으로 고름
+                start, stop, step = index.indices(len(self))
+                positions = range(start, stop, step)
+                if not positions:
+                    return list()
+                if max(positions[0], positions[-1]) < TOP_VOCAB_LIMIT:
+                    top = self.top_vocab(max(positions[0], positions[-1]) + 1)
+                    return [top[position] for position in positions]
+            elif 0 <= index < TOP_VOCAB_LIMIT:
+                if index >= len(self):
+                    raise IndexError('vocab index out of range')
+                return self.top_vocab(index + 1)[index]
+
         return self.sorted_vocab[index]
 
+    def __iter__(self):
+        return iter(self.sorted_vocab)
+
     def __repr__(self):
         # return "<TrainModel %s...>" % (",".join([_vocab[0] for _vocab in self.sorted_vocab[:5]]))
         return "<TrainModel %s>" % self.name
@@ -175,20 +1202,111 @@ class TrainModel:
         :return: 두 벡터를 합친 결과 (벡터)
         """
 
-        # 우선 다시 학습을 시키는 방식으로 진행
+        if self.params != other.params:
+            raise ValueError("cannot add models trained with different parameters (%r != %r)" % (self.params,
+                                                                                                  other.params))
+
+        # 우선 다시 학습을 시키는 방식으로 진행 (다시 학습하지 않으려면 += 또는 update() 사용)
         new_name = self.name + ' + ' + other.name
-        new_model = TrainModel(self.sentences + other.sentences, new_name)
+        new_model = TrainModel(self.sentences + other.sentences, new_name, workers=self.workers, **self.params)
 
         return new_model
 
+    def update(self, train_data):
+        """
+        처음부터 다시 학습하지 않고, 기존 모델의 vocab 에 새 corpus 의 단어를 추가한 뒤
+        새 corpus 만 이어서 학습함.
+
+        :param train_data: 추가할 MakeSentence (또는 ChainedCorpus) 나 TrainModel
+        :return: self
+        """
+        if isinstance(train_data, TrainModel):
+            train_data = train_data.sentences
+
+        # 이어서 학습한 모델은 합친 corpus 를 처음부터 학습한 모델과 다르므로 key 를 따로 만듦
+        # checkpoint 에도 새 key 가 저장되도록 학습 전에 바꿈
+        self.key = ModelStore.key("%s + %s" % (self.model_key(), corpus_fingerprint(train_data)), self.params)
+
+        self.model.build_vocab(train_data.vocab, update=True)
+        self.train_epochs(train_data)
+
+        self.sentences = train_data if getattr(self, 'sentences', None) is None else self.sentences + train_data
+        self.name = "%s + %s" % (self.name, train_data.datapath)
+        self.reset_vocab_index()
+
+        return self
+
+    def vectors(self):
+        """
+        :return: 학습된 단어 벡터의 VectorTable
+        """
+        if self.shared_vectors is not None:
+            return self.shared_vectors
+
+        from vectors import VectorTable
+        return VectorTable.from_model(self.model)
+
+    def export_vectors(self, path, dtype='float32'):
+        """
+        벡터를 gensim 없이 읽을 수 있는 파일로 저장함. vectors.load_vectors(path) 로 읽음.
+
+        :param path: 저장할 경로 (확장자 제외)
+        :param dtype: 'float32', 'float16', 'int8' (행마다 scale), 'pq' (product quantization).
+                      float32 외에는 정규화 벡터만 저장
+        :return: 저장한 경로
+        """
+        if dtype == 'float32':
+            self.vectors().save(path)
+            return path
+
+        if dtype == 'pq':
+            self.product_quantize().save(path)
+            return path
+
+        from vectors import QuantizedVectorTable
+        QuantizedVectorTable.quantize(self.vectors(), dtype).save(path)
+
+        return path
+
+    def product_quantize(self, subvectors=None, centroids=None):
+        """
+        :param subvectors: 벡터를 나눌 조각 수. None 이면 vectors.PQ_SUBVECTORS
+        :param centroids: 조각마다 중심점 수 (최대 256). None 이면 vectors.PQ_CENTROIDS
+        :return: 학습된 벡터를 product quantization 으로 압축한 PQVectorTable (most_similar 사용 가능)
+        """
+        from vectors import PQ_CENTROIDS, PQ_SUBVECTORS, PQVectorTable
+
+        return PQVectorTable.build(self.vectors(), PQ_SUBVECTORS if subvectors is None else subvectors,
+                                   PQ_CENTROIDS if centroids is None else centroids)
+
+    def merge(self, other):
+        """
+        다시 학습하지 않고 두 모델의 벡터 공간을 합침.
+        공유 단어 기준으로 other 의 벡터 공간을 orthogonal Procrustes (SVD 한 번) 로 self 공간에 맞춘 뒤 합침.
+
+        :param other: TrainModel 객체
+        :return: 두 모델의 단어를 모두 가진 VectorTable (most_similar 사용 가능)
+        """
+        from vectors import merge
+        return merge(self.vectors(), other.vectors())
+
+    def __iadd__(self, other):
+        """
+        :param other: 추가할 MakeSentence 또는 TrainModel
+        :return: other 를 이어서 학습한 self (model += new_sentences)
+        """
+        return self.update(other)
+
     def visualization_3d(self):
 
         def partition(alist, indices):
             # 해당 indices 의 리스트 를 반환
+            from numpy import mean
             return [mean(alist[i:j]) for i, j in zip([0] + indices, indices + [None])]
 
         vocab_list = list(self.model.vocab.keys())
 
+        plt = load_pyplot()
         fig = plt.figure(figsize=(18, 13))
         ax = fig.gca(projection='3d')
 
@@ -242,6 +1360,7 @@ class TrainModel:
         # TODO: Here is Error
         vocab_list = list(self.model.vocab.keys())
 
+        plt = load_pyplot()
         fig = plt.figure()
         ax = fig.gca(projection='2d')
 
@@ -263,10 +1382,114 @@ class TrainModel:
     visualization = visualization_3d
 
 
-if __name__ == '__main__':
-    park_sentences = MakeSentence(TRAIN_DATA_PATH + '/park')
+SpeakerResult = namedtuple('SpeakerResult', ['speaker', 'model_path', 'sentences', 'tokenize_seconds',
+                                             'train_seconds'])
+
+
+def discover_speakers(train_path=TRAIN_DATA_PATH):
+    """
+    :param train_path: train/<화자>/ 형태로 화자별 연설이 있는 경로
+    :return: 화자 이름 리스트 (정렬됨)
+    """
+    return sorted(name for name in os.listdir(train_path)
+                  if not name.startswith('.') and os.path.isdir(os.path.join(train_path, name)))
+
+
+def train_speaker(speaker, train_path=TRAIN_DATA_PATH, output_path=MODEL_OUTPUT_PATH, cache_dir=TOKEN_CACHE_PATH,
+                  tokenizer=DEFAULT_TOKENIZER):
+    """
+    화자 한 명의 연설을 형태소 분석하고 학습해서 output_path/<화자>/ 에 저장함.
+    ProcessPoolExecutor 작업 단위이므로 모듈 레벨 함수로 둠.
+
+    :param speaker: 화자 이름 (train_path 아래 디렉터리 이름)
+    :param train_path: 화자별 연설이 있는 경로
+    :param output_path: 화자별 결과를 저장할 경로
+    :param cache_dir: 화자끼리 공유하는 형태소 분석 캐시 경로
+    :param tokenizer: 형태소 분석기 이름
+    :return: SpeakerResult
+    """
+    start = time.perf_counter()
+    sentences = MakeSentence(os.path.join(train_path, speaker), cache_dir=cache_dir, manifest=True,
+                             tokenizer=tokenizer)
+    tokenized = time.perf_counter()
+    vector_model = TrainModel(sentences, name=speaker)
+    trained = time.perf_counter()
+
+    speaker_path = os.path.join(output_path, speaker)
+    os.makedirs(speaker_path, exist_ok=True)
+    model_path = vector_model.save(os.path.join(speaker_path, 'model'))
+
+    result = SpeakerResult(speaker, model_path, len(sentences), tokenized - start, trained - tokenized)
+    with open(os.path.join(speaker_path, 'summary.json'), 'w', encoding='utf-8') as fp:
+        json.dump(result._asdict(), fp, ensure_ascii=False, indent=1)
+
+    return result
+
+
+def train_speakers(train_path=TRAIN_DATA_PATH, output_path=MODEL_OUTPUT_PATH, max_workers=None,
+                   cache_dir=TOKEN_CACHE_PATH, speakers=None, tokenizer=DEFAULT_TOKENIZER):
+    """
+    train_path 아래 모든 화자를 화자별 프로세스에서 동시에 학습함.
+
+    :param train_path: train/<화자>/ 형태로 화자별 연설이 있는 경로
+    :param output_path: 화자별 결과를 저장할 경로
+    :param max_workers: 동시에 학습할 화자 수. None 이면 CPU 수
+    :param cache_dir: 화자끼리 공유하는 형태소 분석 캐시 경로
+    :param speakers: 학습할 화자 리스트. None 이면 train_path 에서 찾음
+    :param tokenizer: 형태소 분석기 이름
+    :return: {화자: SpeakerResult}
+    """
+    if speakers is None:
+        speakers = discover_speakers(train_path)
+
+    results = dict()
+
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = {executor.submit(train_speaker, speaker, train_path, output_path, cache_dir, tokenizer): speaker
+                   for speaker in speakers}
 
-    vector_model = TrainModel(park_sentences)
+        for future in as_completed(futures):
+            result = future.result()
+            results[result.speaker] = result
+            print("%s: %d sentences, tokenize %.1fs, train %.1fs" % (
+                result.speaker, result.sentences, result.tokenize_seconds, result.train_seconds))
+
+    print_speaker_summary(results)
+
+    return results
+
+
+def print_speaker_summary(results):
+    """
+    :param results: train_speakers() 의 결과
+    """
+    print("%-20s %10s %10s %10s" % ('speaker', 'sentences', 'tokenize', 'train'))
+    for speaker in sorted(results):
+        result = results[speaker]
+        print("%-20s %10d %9.1fs %9.1fs" % (speaker, result.sentences, result.tokenize_seconds, result.train_seconds))
+
+    print("%-20s %10d %9.1fs %9.1fs" % ('total', sum(result.sentences for result in results.values()),
+                                        sum(result.tokenize_seconds for result in results.values()),
+                                        sum(result.train_seconds for result in results.values())))
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1 and sys.argv[1] == 'speakers':
+        # python main.py speakers [동시에 학습할 화자 수] : train/ 아래 모든 화자를 학습
+        train_speakers(max_workers=int(sys.argv[2]) if len(sys.argv) > 2 else None)
+        sys.exit(0)
+
+    park_sentences = MakeSentence(TRAIN_DATA_PATH + '/park', cache_dir=TOKEN_CACHE_PATH, manifest=True, dedup=True)
+    print(park_sentences.delta)
+
+    for duplicate in park_sentences.dedup_report:
+        print("skip %s (%.2f similar to %s)" % (duplicate.dropped, duplicate.similarity, duplicate.kept))
+
+    vector_model = TrainModel(park_sentences, store=ModelStore(MODEL_STORE_PATH))
+    if vector_model.cached:
+        print("load %s from %s" % (vector_model.model_key(), vector_model.store))
+    else:
+        print(vector_model.training_summary())
 
     vector_model.visualization()
 
@@ -0,0 +1,116 @@
+import json
+import os
+from collections import namedtuple
+
+from token_cache import file_digest
+
+# 학습 데이터 경로 안에 저장되는 manifest 파일 이름. '.' 으로 시작하므로 학습 파일 탐색에서 제외됨
+MANIFEST_NAME = '.manifest.json'
+MANIFEST_VERSION = 1
+
+
+class ManifestDelta(namedtuple('ManifestDelta', ['added', 'modified', 'removed', 'unchanged'])):
+    """
+    이전 manifest 와 비교한 학습 파일 변경 내역. 각 항목은 상대 경로 리스트.
+    """
+
+    @property
+    def changed(self):
+        return bool(self.added or self.modified or self.removed)
+
+    def __repr__(self):
+        return "<ManifestDelta added=%d, modified=%d, removed=%d, unchanged=%d>" % (
+            len(self.added), len(self.modified), len(self.removed), len(self.unchanged))
+
+
+class CorpusManifest:
+    """
+    학습 데이터 경로의 파일 목록 (경로, 크기, mtime, hash, 문장 수) 을 저장해 두고
+    다음 빌드 때 추가 / 수정 / 삭제된 파일만 골라낼 수 있게 함.
+    """
+
+    def __init__(self, datapath, entries=None):
+        """
+        :param datapath: 학습할 데이터가 있는 경로
+        :param entries: {상대 경로: {'size', 'mtime', 'hash', 'sentences'}}
+        """
+        self.datapath = datapath
+        self.path = os.path.join(datapath, MANIFEST_NAME)
+        self.entries = entries or dict()
+
+    @classmethod
+    def load(cls, datapath):
+        """
+        :param datapath: 학습할 데이터가 있는 경로
+        :return: 저장된 manifest. 없거나 읽을 수 없으면 빈 manifest
+        """
+        try:
+            with open(os.path.join(datapath, MANIFEST_NAME), 'r', encoding='utf-8') as fp:
+                data = json.load(fp)
+        except (OSError, ValueError):
+            return cls(datapath)
+
+        if data.get('version') != MANIFEST_VERSION:
+            return cls(datapath)
+
+        return cls(datapath, data['files'])
+
+    def save(self):
+        tmp_path = "%s.%d.tmp" % (self.path, os.getpid())
+        with open(tmp_path, 'w', encoding='utf-8') as fp:
+            json.dump({'version': MANIFEST_VERSION, 'files': self.entries}, fp, ensure_ascii=False, indent=1,
+                      sort_keys=True)
+        os.replace(tmp_path, self.path)
+
+    def relpath(self, path):
+        return os.path.relpath(path, self.datapath)
+
+    def update(self, paths):
+        """
+        현재 파일 목록으로 manifest 를 갱신함.
+        크기와 mtime 이 그대로인 파일은 hash 를 다시 계산하지 않음.
+
+        :param paths: 현재 학습 파일 경로 리스트
+        :return: ManifestDelta
+        """
+        added, modified, unchanged = list(), list(), list()
+        entries = dict()
+
+        for path in paths:
+            name = self.relpath(path)
+            stat = os.stat(path)
+            old = self.entries.get(name)
+
+            if old is not None and old['size'] == stat.st_size and old['mtime'] == stat.st_mtime:
+                entries[name] = old
+                unchanged.append(name)
+                continue
+
+            digest = file_digest(path)
+            entries[name] = {'size': stat.st_size, 'mtime': stat.st_mtime, 'hash': digest, 'sentences': None}
+
+            if old is None:
+                added.append(name)
+            elif old['hash'] == digest:
+                # touch 등으로 mtime 만 바뀐 경우
+                entries[name]['sentences'] = old['sentences']
+                unchanged.append(name)
+            else:
+                modified.append(name)
+
+        removed = sorted(set(self.entries) - set(entries))
+        self.entries = entries
+
+        return ManifestDelta(added, modified, removed, unchanged)
+
+    def digest(self, path):
+        return self.entries[self.relpath(path)]['hash']
+
+    def set_sentence_count(self, path, count):
+        self.entries[self.relpath(path)]['sentences'] = count
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __repr__(self):
+        return "<CorpusManifest %s (%d files)>" % (self.datapath, len(self.entries))
@@ -0,0 +1,153 @@
+import hashlib
+import json
+import os
+import shutil
+import time
+
+# 저장 포맷이나 key 를 만드는 방식이 바뀌면 올려서 예전 모델을 무시하게 함
+STORE_FORMAT_VERSION = 1
+# 기본으로 남겨둘 최대 모델 수
+MAX_MODELS = 20
+
+MODEL_NAME = 'model'
+META_NAME = 'meta.json'
+
+
+class ModelStore:
+    """
+    학습한 모델을 (corpus fingerprint, hyper-parameter) 의 hash 로 찾는 디스크 저장소.
+    입력이 같으면 같은 key 가 나오므로 다시 학습하지 않고 저장된 모델을 읽을 수 있음.
+    오래 사용하지 않은 모델부터 지워서 모델 수 / 전체 크기를 제한함. (LRU)
+    """
+
+    def __init__(self, store_dir, max_models=MAX_MODELS, max_bytes=None):
+        """
+        :param store_dir: 모델을 저장할 경로
+        :param max_models: 남겨둘 최대 모델 수. None 이면 제한 없음
+        :param max_bytes: 남겨둘 전체 모델 크기 (byte). None 이면 제한 없음
+        """
+        self.store_dir = store_dir
+        self.max_models = max_models
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(fingerprint, params):
+        """
+        :param fingerprint: 학습 corpus 의 fingerprint (형태소 분석기 버전 포함)
+        :param params: 결과에 영향을 주는 hyper-parameter dict
+        :return: 모델 key
+        """
+        text = json.dumps({'corpus': fingerprint, 'params': params, 'format': STORE_FORMAT_VERSION},
+                          sort_keys=True)
+        return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+    def entry_dir(self, key):
+        return os.path.join(self.store_dir, key)
+
+    def model_path(self, key):
+        return os.path.join(self.entry_dir(key), MODEL_NAME)
+
+    def lookup(self, key):
+        """
+        :param key: 모델 key
+        :return: 저장된 모델 경로. 없으면 None
+        """
+        meta_path = os.path.join(self.entry_dir(key), META_NAME)
+        if not os.path.exists(meta_path):
+            self.misses += 1
+            return None
+
+        # meta 파일의 mtime 을 마지막 사용 시각으로 씀
+        os.utime(meta_path)
+        self.hits += 1
+        return self.model_path(key)
+
+    def __contains__(self, key):
+        """
+        :return: key 의 모델이 저장되어 있으면 True (lookup 과 달리 사용 시각을 바꾸지 않음)
+        """
+        return os.path.exists(os.path.join(self.entry_dir(key), META_NAME))
+
+    def store(self, key, model, meta=None, **save_options):
+        """
+        :param key: 모델 key
+        :param model: 저장할 모델 (save(path) 가 있는 객체. TrainModel 또는 gensim 모델)
+        :param meta: 모델과 함께 저장할 정보 dict (이름, hyper-parameter 등)
+        :param save_options: model.save 에 그대로 넘길 인자
+        :return: 저장된 모델 경로
+        """
+        os.makedirs(self.store_dir, exist_ok=True)
+
+        # gensim 은 큰 배열을 별도 파일로 저장하므로 임시 디렉터리에 다 쓴 다음 디렉터리째 rename
+        tmp_dir = os.path.join(self.store_dir, ".%s.%d.tmp" % (key, os.getpid()))
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        os.makedirs(tmp_dir)
+
+        model.save(os.path.join(tmp_dir, MODEL_NAME), **save_options)
+        with open(os.path.join(tmp_dir, META_NAME), 'w', encoding='utf-8') as fp:
+            json.dump(dict(meta or dict(), key=key, created=time.time()), fp, ensure_ascii=False, indent=1)
+
+        try:
+            os.rename(tmp_dir, self.entry_dir(key))
+        except OSError:
+            # 다른 프로세스가 같은 모델을 먼저 저장함
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+        self.evict(keep=key)
+        return self.model_path(key)
+
+    def entries(self):
+        """
+        :return: [(key, 마지막 사용 시각, 크기 (byte)), ...] 오래 사용하지 않은 순
+        """
+        entries = list()
+        if not os.path.isdir(self.store_dir):
+            return entries
+
+        for key in os.listdir(self.store_dir):
+            meta_path = os.path.join(self.entry_dir(key), META_NAME)
+            try:
+                last_used = os.stat(meta_path).st_mtime
+            except OSError:
+                continue
+
+            size = sum(os.path.getsize(os.path.join(self.entry_dir(key), filename))
+                       for filename in os.listdir(self.entry_dir(key)))
+            entries.append((key, last_used, size))
+
+        return sorted(entries, key=lambda entry: entry[1])
+
+    def evict(self, keep=None):
+        """
+        max_models, max_bytes 를 넘으면 오래 사용하지 않은 모델부터 지움.
+
+        :param keep: 지우지 않을 key (방금 저장한 모델)
+        :return: 지운 key 리스트
+        """
+        entries = self.entries()
+        count = len(entries)
+        total = sum(size for _, _, size in entries)
+        evicted = list()
+
+        for key, _, size in entries:
+            over_count = self.max_models is not None and count > self.max_models
+            over_size = self.max_bytes is not None and total > self.max_bytes
+            if not (over_count or over_size):
+                break
+            if key == keep:
+                continue
+
+            shutil.rmtree(self.entry_dir(key), ignore_errors=True)
+            evicted.append(key)
+            count -= 1
+            total -= size
+
+        return evicted
+
+    def __len__(self):
+        return len(self.entries())
+
+    def __repr__(self):
+        return "<ModelStore %s (hits=%d, misses=%d)>" % (self.store_dir, self.hits, self.misses)
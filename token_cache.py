@@ -0,0 +1,92 @@
+import hashlib
+import os
+import pickle
+import zlib
+
+# 캐시 파일 포맷이 바뀌면 올려서 예전 캐시를 무시하게 함
+CACHE_FORMAT_VERSION = 1
+
+
+def file_digest(path, block_size=1024 * 1024):
+    """
+    :param path: 파일 경로
+    :param block_size: 한 번에 읽을 byte 수
+    :return: 파일 내용의 sha1 hex digest
+    """
+    digest = hashlib.sha1()
+    with open(path, 'rb') as fp:
+        for block in iter(lambda: fp.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class TokenCache:
+    """
+    형태소 분석 결과를 (파일 내용 hash, tokenizer 이름/버전, 품사 필터) 로 찾는 디스크 캐시.
+    파일 경로가 아닌 내용으로 찾기 때문에 파일을 옮기거나 이름을 바꿔도 다시 분석하지 않음.
+    """
+
+    def __init__(self, cache_dir, tokenizer_name, tokenizer_version, pos_filter):
+        """
+        :param cache_dir: 캐시를 저장할 경로
+        :param tokenizer_name: 형태소 분석기 이름 (ex. 'mecab')
+        :param tokenizer_version: 형태소 분석기 버전
+        :param pos_filter: 분석 결과에 영향을 주는 품사 필터
+        """
+        self.cache_dir = cache_dir
+        self.namespace = "%s:%s:%s:%d" % (tokenizer_name, tokenizer_version, ",".join(pos_filter),
+                                          CACHE_FORMAT_VERSION)
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, path, digest=None):
+        """
+        :param path: 학습 파일 경로
+        :param digest: 미리 계산한 파일 hash 가 있으면 다시 계산하지 않음
+        :return: 캐시 key
+        """
+        if digest is None:
+            digest = file_digest(path)
+        return hashlib.sha1((self.namespace + ':' + digest).encode('utf-8')).hexdigest()
+
+    def entry_path(self, key):
+        # 한 디렉터리에 파일이 너무 많아지지 않도록 앞 두 글자로 나눔
+        return os.path.join(self.cache_dir, key[:2], key + '.bin')
+
+    def __contains__(self, key):
+        """
+        :return: key 의 캐시 파일이 있으면 True (내용은 읽지 않음)
+        """
+        return os.path.exists(self.entry_path(key))
+
+    def load(self, key):
+        """
+        :param key: 캐시 key
+        :return: 저장된 (문장 리스트, NNG/NNP 명사 리스트). 없으면 None
+        """
+        try:
+            with open(self.entry_path(key), 'rb') as fp:
+                value = pickle.loads(zlib.decompress(fp.read()))
+        except (OSError, EOFError, zlib.error, pickle.UnpicklingError):
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        return value
+
+    def store(self, key, value):
+        """
+        :param key: 캐시 key
+        :param value: (문장 리스트, NNG/NNP 명사 리스트)
+        """
+        path = self.entry_path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        # 다른 프로세스가 반쯤 쓰인 파일을 읽지 않도록 임시 파일에 쓴 다음 rename
+        tmp_path = "%s.%d.tmp" % (path, os.getpid())
+        with open(tmp_path, 'wb') as fp:
+            fp.write(zlib.compress(pickle.dumps(value, pickle.HIGHEST_PROTOCOL)))
+        os.replace(tmp_path, path)
+
+    def __repr__(self):
+        return "<TokenCache %s (hits=%d, misses=%d)>" % (self.cache_dir, self.hits, self.misses)
@@ -0,0 +1,166 @@
+import re
+
+# mecab.nouns 와 같은 기준 (품사 태그가 N 으로 시작하면 명사)
+NOUN_TAG_PREFIX = 'N'
+
+DEFAULT_TOKENIZER = 'mecab'
+
+# 여러 줄을 한 번에 분석할 때 줄 사이에 넣는 구분 기호. 연설문에 나오지 않는 제어문자 기호를 사용
+SENTINEL = '\u2402'
+# Mecab 한 번에 넘기는 최대 글자 수. 너무 길면 lattice 가 커져서 오히려 느려짐
+MAX_BATCH_CHARS = 64 * 1024
+# pos_batch 로 여러 줄을 이어붙여 분석하면 줄마다 분석한 것과 결과가 다를 수 있음.
+# 이어붙이는 방식이 바뀌면 올려서 예전 캐시 / 모델을 무시하게 함
+BATCH_REVISION = 1
+
+
+class Tokenizer:
+    """
+    형태소 분석기 interface. pos() 만 구현하면 나머지는 pos() 를 사용함.
+    name / version 은 형태소 분석 캐시 key 에 들어가므로 결과가 바뀌면 version 을 올려야 함.
+    """
+    name = None
+    version = None
+
+    def pos(self, text):
+        """
+        :param text: 분석할 문장
+        :return: [(단어, 품사 태그), ...]
+        """
+        raise NotImplementedError
+
+    def pos_batch(self, lines):
+        """
+        :param lines: 분석할 문장 리스트
+        :return: 문장마다 pos() 결과 리스트
+        """
+        return [self.pos(line) for line in lines]
+
+    def nouns(self, text):
+        return [word for word, tag in self.pos(text) if tag.startswith(NOUN_TAG_PREFIX)]
+
+    def nouns_batch(self, lines):
+        return [[word for word, tag in tagged if tag.startswith(NOUN_TAG_PREFIX)] for tagged in self.pos_batch(lines)]
+
+    def __repr__(self):
+        return "<%s %s %s>" % (self.__class__.__name__, self.name, self.version)
+
+
+class MecabTokenizer(Tokenizer):
+    """
+    konlpy Mecab. import 가 느리므로 처음 분석할 때 Mecab 객체를 만듦.
+    """
+    name = 'mecab'
+
+    def __init__(self):
+        self.tagger = None
+
+    @property
+    def version(self):
+        import konlpy
+        return "%s+batch%d" % (getattr(konlpy, '__version__', 'unknown'), BATCH_REVISION)
+
+    def pos(self, text):
+        if self.tagger is None:
+            from konlpy.tag import Mecab
+            self.tagger = Mecab()
+        return self.tagger.pos(text)
+
+    def pos_batch(self, lines):
+        """
+        줄마다 Mecab 을 부르면 Python <-> C 호출과 결과 객체 생성 비용이 줄 수만큼 듦.
+        줄을 SENTINEL 로 이어붙여 한 번에 분석한 뒤 SENTINEL 위치에서 다시 나눔.
+
+        :param lines: 분석할 문장 리스트
+        :return: 문장마다 pos() 결과 리스트
+        """
+        results = list()
+        group = list()
+        group_chars = 0
+
+        for line in lines:
+            if group and group_chars + len(line) > MAX_BATCH_CHARS:
+                results += self.pos_joined(group)
+                group = list()
+                group_chars = 0
+            group.append(line)
+            group_chars += len(line)
+
+        if group:
+            results += self.pos_joined(group)
+
+        return results
+
+    def pos_joined(self, lines):
+        """
+        :param lines: 한 번에 분석할 문장 리스트
+        :return: 문장마다 pos() 결과 리스트. 나눈 결과가 줄 수와 맞지 않으면 줄마다 다시 분석
+        """
+        if len(lines) == 1 or any(SENTINEL in line for line in lines):
+            return Tokenizer.pos_batch(self, lines)
+
+        # 양쪽에 공백을 두어 SENTINEL 이 앞뒤 기호와 한 형태소로 묶이지 않게 함
+        text = (' %s ' % SENTINEL).join(' '.join(line.split()) for line in lines)
+
+        results = [list()]
+        for word, tag in self.pos(text):
+            if word == SENTINEL:
+                results.append(list())
+            else:
+                results[-1].append((word, tag))
+
+        if len(results) != len(lines):
+            return Tokenizer.pos_batch(self, lines)
+
+        return results
+
+
+class RegexTokenizer(Tokenizer):
+    """
+    Mecab 을 설치할 수 없는 환경을 위한 정규식 기반 분석기.
+    어절 끝의 조사를 떼어낸 뒤 2글자 이상 한글 / 영문 단어를 모두 일반명사 (NNG) 로 봄. 품질보다 속도 우선.
+    """
+    name = 'regex'
+    version = '1'
+
+    WORD = re.compile(r'[가-힣]+|[A-Za-z]+')
+    # 긴 조사부터 떼어내야 '에서' 가 '에' 로 잘리지 않음
+    JOSA = re.compile(r'(에서는|에게서|으로서|으로써|까지|부터|에서|에게|으로|처럼|보다|이나|이며|'
+                      r'은|는|이|가|을|를|의|에|와|과|도|만|로|나)$')
+
+    def pos(self, text):
+        tagged = list()
+        for word in self.WORD.findall(text):
+            stem = self.JOSA.sub('', word) if len(word) > 2 else word
+            if len(stem) >= 2:
+                tagged.append((stem, 'NNG'))
+        return tagged
+
+
+TOKENIZERS = {
+    MecabTokenizer.name: MecabTokenizer,
+    RegexTokenizer.name: RegexTokenizer,
+}
+
+# 프로세스마다 분석기를 하나씩만 만듦
+_instances = dict()
+
+
+def get_tokenizer(name=DEFAULT_TOKENIZER):
+    """
+    :param name: TOKENIZERS 의 key
+    :return: 현재 프로세스의 Tokenizer 객체. 처음 호출될 때 만듦
+    """
+    if name not in _instances:
+        try:
+            _instances[name] = TOKENIZERS[name]()
+        except KeyError:
+            raise ValueError("unknown tokenizer %r (available: %s)" % (name, ", ".join(sorted(TOKENIZERS))))
+    return _instances[name]
+
+
+def reset_tokenizers():
+    """
+    worker 프로세스가 부모 프로세스에서 만든 분석기를 물려받지 않도록 비움.
+    """
+    _instances.clear()
@@ -0,0 +1,609 @@
+import os
+
+import numpy
+
+# gensim 모델 옆에 저장하는 공유용 벡터 파일 이름 (model_path + VECTORS_SUFFIX + '.words' 등)
+VECTORS_SUFFIX = '.vectors'
+
+# QuantizedVectorTable 이 지원하는 저장 형식
+QUANTIZED_DTYPES = ('float16', 'int8')
+# 양자화된 행렬로 유사도를 계산할 때 한 번에 float32 로 바꾸는 행 수
+BLOCK_ROWS = 65536
+
+# product quantization 기본값. 벡터를 PQ_SUBVECTORS 조각으로 나누고 조각마다 PQ_CENTROIDS 개 중심점 번호 (uint8) 로 저장
+PQ_SUBVECTORS = 8
+PQ_CENTROIDS = 256
+KMEANS_ITERATIONS = 20
+# codebook 을 학습할 때 사용할 최대 단어 수 (나머지는 학습한 codebook 으로 인코딩만 함)
+PQ_TRAIN_SAMPLE = 65536
+
+
+class VectorTable:
+    """
+    단어 리스트와 단어 벡터 행렬만 가진 읽기 전용 벡터 테이블.
+    gensim 모델 없이 most_similar 를 계산할 때 사용 (모델 병합 결과 등).
+    """
+
+    def __init__(self, words, matrix):
+        """
+        :param words: 단어 리스트 (matrix 의 행 순서)
+        :param matrix: (단어 수, 차원) 벡터 행렬
+        """
+        self.words = list(words)
+        self.word2index = {word: index for index, word in enumerate(self.words)}
+        self.matrix = numpy.asarray(matrix, dtype=numpy.float32)
+        self._normalized = None
+
+    @classmethod
+    def from_model(cls, model):
+        """
+        :param model: gensim Word2Vec
+        :return: VectorTable
+        """
+        return cls(model.index2word, model.syn0)
+
+    def save(self, path):
+        """
+        단어 리스트와 벡터 / 정규화 벡터 행렬을 저장함. (path.words, path.matrix.npy, path.normalized.npy)
+        정규화 벡터를 같이 저장해 두면 load 할 때 프로세스마다 다시 계산하지 않음.
+        다른 프로세스가 반쯤 쓰인 파일을 읽지 않도록 파일마다 임시 파일에 쓴 뒤 rename 하고, normalized 를 마지막에 씀.
+
+        :param path: 저장할 경로 (확장자 제외)
+        """
+        write_atomic(path + '.words', lambda fp: fp.write("".join(word + '\n' for word in self.words).encode('utf-8')))
+        write_atomic(path + '.matrix.npy', lambda fp: numpy.save(fp, self.matrix))
+        write_atomic(path + '.normalized.npy', lambda fp: numpy.save(fp, self.normalized))
+
+    @classmethod
+    def load(cls, path, mmap=True):
+        """
+        :param path: save() 에 넘긴 경로
+        :param mmap: True 일 경우 행렬을 메모리에 복사하지 않고 읽기 전용으로 mmap 함.
+                     같은 파일을 읽는 프로세스끼리 page cache 를 공유하고, 행렬 크기와 상관없이 바로 읽힘
+        :return: VectorTable
+        """
+        mmap_mode = 'r' if mmap else None
+
+        with open(path + '.words', 'r', encoding='utf-8') as fp:
+            words = [line.rstrip('\n') for line in fp]
+
+        table = cls(words, numpy.load(path + '.matrix.npy', mmap_mode=mmap_mode))
+        table._normalized = numpy.load(path + '.normalized.npy', mmap_mode=mmap_mode)
+        return table
+
+    @property
+    def normalized(self):
+        """
+        :return: 행마다 길이를 1 로 맞춘 행렬 (cosine similarity 용)
+        """
+        if self._normalized is None:
+            self._normalized = normalize(self.matrix)
+        return self._normalized
+
+    def vector(self, word):
+        return self.matrix[self.word2index[word]]
+
+    def most_similar(self, positive=(), negative=(), topn=10):
+        """
+        gensim 의 most_similar 와 같은 방식 (정규화한 벡터의 평균과 cosine similarity)
+
+        :param positive: 더할 단어 (또는 단어 리스트)
+        :param negative: 뺄 단어 리스트
+        :param topn: 반환할 단어 수
+        :return: [(단어, 유사도), ...]
+        """
+        if isinstance(positive, str):
+            positive = [positive]
+
+        query = self.query_vector(positive, negative)
+        return self.top_similar(self.normalized.dot(query), topn, set(positive) | set(negative))
+
+    def query_vector(self, positive, negative):
+        terms = [self.normalized[self.word2index[word]] for word in positive] + \
+                [-self.normalized[self.word2index[word]] for word in negative]
+        if not terms:
+            raise ValueError('cannot compute similarity with no input')
+        return normalize(numpy.mean(terms, axis=0))
+
+    def top_similar(self, similarities, topn, exclude):
+        """
+        :param similarities: 단어마다 유사도 배열
+        :param topn: 반환할 단어 수
+        :param exclude: 결과에서 뺄 단어 (질의 단어)
+        :return: [(단어, 유사도), ...]
+        """
+        count = min(len(similarities), topn + len(exclude))
+        if count <= 0:
+            return list()
+
+        # 전체 정렬 대신 argpartition 으로 상위 count 개만 고른 뒤 정렬
+        best = numpy.argpartition(-similarities, count - 1)[:count]
+        best = best[numpy.argsort(-similarities[best])]
+
+        return [(self.words[index], float(similarities[index])) for index in best
+                if self.words[index] not in exclude][:topn]
+
+    @property
+    def nbytes(self):
+        """
+        :return: 벡터 행렬이 차지하는 byte 수 (단어 리스트 제외)
+        """
+        return self.matrix.nbytes
+
+    def __contains__(self, word):
+        return word in self.word2index
+
+    def __getitem__(self, word):
+        return self.vector(word)
+
+    def __len__(self):
+        return len(self.words)
+
+    def __repr__(self):
+        return "<%s %d words x %d>" % (self.__class__.__name__, len(self), self.matrix.shape[1])
+
+
+class QuantizedVectorTable(VectorTable):
+    """
+    정규화 벡터를 float16 또는 int8 (행마다 float32 scale 하나) 로 저장한 읽기 전용 벡터 테이블.
+    float32 대비 메모리가 float16 은 1/2, int8 은 약 1/4.
+    유사도는 행렬 전체를 float32 로 바꾸지 않고 BLOCK_ROWS 행씩 바꿔 계산하므로 추가 메모리는 block 크기만큼만 듦.
+    """
+
+    def __init__(self, words, codes, scales=None):
+        """
+        :param words: 단어 리스트 (codes 의 행 순서)
+        :param codes: (단어 수, 차원) float16 또는 int8 행렬
+        :param scales: int8 일 때 행마다 곱할 float32 scale. float16 이면 None
+        """
+        self.words = list(words)
+        self.word2index = {word: index for index, word in enumerate(self.words)}
+        self.codes = codes
+        self.scales = scales
+
+    @classmethod
+    def quantize(cls, table, dtype='int8'):
+        """
+        :param table: VectorTable
+        :param dtype: 'float16' 또는 'int8'
+        :return: table 의 정규화 벡터를 양자화한 QuantizedVectorTable
+        """
+        normalized = table.normalized
+
+        if dtype == 'float16':
+            return cls(table.words, normalized.astype(numpy.float16))
+
+        if dtype == 'int8':
+            # 행마다 절댓값이 가장 큰 원소가 127 이 되도록 scale 을 정함
+            scales = numpy.abs(normalized).max(axis=1) / 127
+            scales[scales == 0] = 1
+            codes = numpy.round(normalized / scales[:, None]).astype(numpy.int8)
+            return cls(table.words, codes, scales.astype(numpy.float32))
+
+        raise ValueError("unsupported dtype %r (available: %s)" % (dtype, ", ".join(QUANTIZED_DTYPES)))
+
+    @property
+    def dtype(self):
+        return self.codes.dtype.name
+
+    def rows(self, indices):
+        """
+        :param indices: 행 번호 (리스트 또는 slice)
+        :return: 해당 행을 float32 로 되돌린 행렬
+        """
+        rows = numpy.asarray(self.codes[indices], dtype=numpy.float32)
+        if self.scales is not None:
+            rows *= self.scales[indices][..., None]
+        return rows
+
+    @property
+    def matrix(self):
+        """
+        :return: 전체 행렬을 float32 로 되돌린 행렬 (메모리를 float32 만큼 사용함)
+        """
+        return self.rows(slice(None))
+
+    @property
+    def normalized(self):
+        return self.matrix
+
+    def vector(self, word):
+        return self.rows(self.word2index[word])
+
+    def similarities(self, query):
+        """
+        :param query: 길이가 1 인 float32 질의 벡터
+        :return: 단어마다 cosine similarity
+        """
+        query = numpy.asarray(query, dtype=numpy.float32)
+        similarities = numpy.empty(len(self.words), dtype=numpy.float32)
+
+        for start in range(0, len(self.words), BLOCK_ROWS):
+            block = numpy.asarray(self.codes[start:start + BLOCK_ROWS], dtype=numpy.float32)
+            similarities[start:start + len(block)] = block.dot(query)
+
+        if self.scales is not None:
+            similarities *= self.scales
+
+        return similarities
+
+    def most_similar(self, positive=(), negative=(), topn=10):
+        if isinstance(positive, str):
+            positive = [positive]
+
+        query = self.query_vector(positive, negative)
+        return self.top_similar(self.similarities(query), topn, set(positive) | set(negative))
+
+    def query_vector(self, positive, negative):
+        terms = [self.vector(word) for word in positive] + [-self.vector(word) for word in negative]
+        if not terms:
+            raise ValueError('cannot compute similarity with no input')
+        return normalize(numpy.mean(terms, axis=0))
+
+    @property
+    def nbytes(self):
+        return self.codes.nbytes + (0 if self.scales is None else self.scales.nbytes)
+
+    def save(self, path):
+        """
+        :param path: 저장할 경로 (확장자 제외). path.words, path.codes.npy, (int8 이면) path.scales.npy
+        """
+        write_atomic(path + '.words', lambda fp: fp.write("".join(word + '\n' for word in self.words).encode('utf-8')))
+        if self.scales is not None:
+            write_atomic(path + '.scales.npy', lambda fp: numpy.save(fp, self.scales))
+        write_atomic(path + '.codes.npy', lambda fp: numpy.save(fp, self.codes))
+
+    @classmethod
+    def load(cls, path, mmap=True):
+        mmap_mode = 'r' if mmap else None
+
+        with open(path + '.words', 'r', encoding='utf-8') as fp:
+            words = [line.rstrip('\n') for line in fp]
+
+        codes = numpy.load(path + '.codes.npy', mmap_mode=mmap_mode)
+        scales = numpy.load(path + '.scales.npy', mmap_mode=mmap_mode) if codes.dtype == numpy.int8 else None
+
+        return cls(words, codes, scales)
+
+    def __repr__(self):
+        return "<%s %d words x %d %s>" % (self.__class__.__name__, len(self), self.codes.shape[1], self.dtype)
+
+
+class PQVectorTable(QuantizedVectorTable):
+    """
+    product quantization 으로 압축한 읽기 전용 벡터 테이블.
+    정규화 벡터의 차원을 subvectors 조각으로 나누고 (나누어 떨어지지 않으면 앞 조각이 한 차원 더 김),
+    조각마다 k-means 로 만든 codebook 의 중심점 번호 (uint8) 만 저장함. 단어 하나에 subvectors byte.
+
+    유사도는 asymmetric distance 로 계산함. 질의 벡터는 양자화하지 않고 조각마다 (중심점 수) 크기의
+    내적 표를 한 번 만든 뒤, 단어마다 code 로 표를 찾아 더하기만 함.
+    code 는 조각별로 연속되게 (subvectors, 단어 수) 로 저장해서 조각마다 take 한 번으로 표를 찾음.
+    """
+
+    def __init__(self, words, codebooks, codes, bounds):
+        """
+        :param words: 단어 리스트 (codes 의 행 순서)
+        :param codebooks: (subvectors, 중심점 수, 가장 긴 조각 차원) float32. 짧은 조각은 뒤를 0 으로 채움
+        :param codes: (subvectors, 단어 수) uint8
+        :param bounds: 조각 경계 (subvectors + 1 개). 조각 j 는 [bounds[j], bounds[j + 1]) 차원
+        """
+        self.words = list(words)
+        self.word2index = {word: index for index, word in enumerate(self.words)}
+        self.codebooks = codebooks
+        self.codes = codes
+        self.bounds = [int(bound) for bound in bounds]
+        self.scales = None
+
+    @classmethod
+    def build(cls, table, subvectors=PQ_SUBVECTORS, centroids=PQ_CENTROIDS, iterations=KMEANS_ITERATIONS,
+              train_sample=PQ_TRAIN_SAMPLE, seed=1):
+        """
+        :param table: VectorTable
+        :param subvectors: 벡터를 나눌 조각 수. 차원보다 크면 차원 수로 줄임
+        :param centroids: 조각마다 중심점 수 (최대 256)
+        :param iterations: k-means 반복 횟수
+        :param train_sample: codebook 학습에 사용할 최대 단어 수
+        :param seed: random seed
+        :return: PQVectorTable
+        """
+        if not 1 <= centroids <= 256:
+            raise ValueError("centroids must be between 1 and 256 for uint8 codes, got %d" % centroids)
+
+        normalized = table.normalized
+        dimension = normalized.shape[1]
+        subvectors = max(1, min(subvectors, dimension))
+        bounds = [0] + [int(part[-1]) + 1 for part in numpy.array_split(numpy.arange(dimension), subvectors)]
+        width = max(bounds[j + 1] - bounds[j] for j in range(subvectors))
+
+        random = numpy.random.RandomState(seed)
+        if len(normalized) > train_sample:
+            sample = normalized[numpy.sort(random.choice(len(normalized), train_sample, replace=False))]
+        else:
+            sample = normalized
+
+        codebooks = numpy.zeros((subvectors, min(centroids, max(len(sample), 1)), width), dtype=numpy.float32)
+        codes = numpy.zeros((subvectors, len(normalized)), dtype=numpy.uint8)
+
+        for j in range(subvectors):
+            start, end = bounds[j], bounds[j + 1]
+            if len(sample):
+                codebooks[j, :, :end - start] = kmeans(sample[:, start:end], codebooks.shape[1], iterations, random)
+            codes[j] = nearest_centroids(normalized[:, start:end], codebooks[j, :, :end - start])
+
+        return cls(table.words, codebooks, codes, bounds)
+
+    @property
+    def dtype(self):
+        return 'pq%d' % len(self.bounds[1:])
+
+    def rows(self, indices):
+        """
+        :param indices: 행 번호 (리스트 또는 slice)
+        :return: code 를 중심점으로 되돌린 float32 행렬
+        """
+        codes = self.codes[:, indices]
+        rows = numpy.empty(codes.shape[1:] + (self.bounds[-1],), dtype=numpy.float32)
+        for j in range(len(self.bounds) - 1):
+            start, end = self.bounds[j], self.bounds[j + 1]
+            rows[..., start:end] = self.codebooks[j, codes[j], :end - start]
+        return rows
+
+    def distance_table(self, query):
+        """
+        :param query: float32 질의 벡터
+        :return: (subvectors, 중심점 수) 조각별 질의 조각과 중심점의 내적
+        """
+        table = numpy.empty(self.codebooks.shape[:2], dtype=numpy.float32)
+        for j in range(len(self.bounds) - 1):
+            start, end = self.bounds[j], self.bounds[j + 1]
+            table[j] = self.codebooks[j, :, :end - start].dot(query[start:end])
+        return table
+
+    def similarities(self, query):
+        """
+        :param query: 길이가 1 인 float32 질의 벡터
+        :return: 단어마다 질의 벡터와 복원한 벡터의 내적 (asymmetric distance)
+        """
+        table = self.distance_table(numpy.asarray(query, dtype=numpy.float32))
+        similarities = numpy.zeros(len(self.words), dtype=numpy.float32)
+
+        for start in range(0, len(self.words), BLOCK_ROWS):
+            block = similarities[start:start + BLOCK_ROWS]
+            for j in range(len(table)):
+                block += table[j].take(self.codes[j, start:start + BLOCK_ROWS])
+
+        return similarities
+
+    @property
+    def nbytes(self):
+        return self.codes.nbytes + self.codebooks.nbytes
+
+    def __repr__(self):
+        return "<%s %d words x %d, %d subvectors x %d centroids>" % (
+            self.__class__.__name__, len(self), self.bounds[-1], len(self.bounds) - 1, self.codebooks.shape[1])
+
+    def save(self, path):
+        """
+        :param path: 저장할 경로 (확장자 제외). path.words, path.codebooks.npy, path.bounds.npy, path.pq.npy
+        """
+        write_atomic(path + '.words', lambda fp: fp.write("".join(word + '\n' for word in self.words).encode('utf-8')))
+        write_atomic(path + '.codebooks.npy', lambda fp: numpy.save(fp, self.codebooks))
+        write_atomic(path + '.bounds.npy', lambda fp: numpy.save(fp, numpy.array(self.bounds, dtype=numpy.int64)))
+        write_atomic(path + '.pq.npy', lambda fp: numpy.save(fp, self.codes))
+
+    @classmethod
+    def load(cls, path, mmap=True):
+        with open(path + '.words', 'r', encoding='utf-8') as fp:
+            words = [line.rstrip('\n') for line in fp]
+
+        # codebook 은 작으므로 항상 메모리로 읽고, 단어 수에 비례하는 code 만 mmap 함
+        codes = numpy.load(path + '.pq.npy', mmap_mode='r' if mmap else None)
+        return cls(words, numpy.load(path + '.codebooks.npy'), codes, numpy.load(path + '.bounds.npy'))
+
+
+def kmeans(data, k, iterations=KMEANS_ITERATIONS, random=None):
+    """
+    :param data: (n, d) float32 행렬
+    :param k: 중심점 수 (n 이하)
+    :param iterations: 반복 횟수
+    :param random: numpy RandomState
+    :return: (k, d) 중심점 행렬
+    """
+    if random is None:
+        random = numpy.random.RandomState(1)
+
+    centers = data[random.choice(len(data), k, replace=False)].astype(numpy.float32)
+
+    for _ in range(iterations):
+        labels = nearest_centroids(data, centers)
+        counts = numpy.bincount(labels, minlength=k)
+
+        sums = numpy.stack([numpy.bincount(labels, weights=column, minlength=k) for column in data.T], axis=1)
+
+        empty = counts == 0
+        centers[~empty] = sums[~empty] / counts[~empty, None]
+        # 빈 중심점은 아무 점으로 다시 뽑음
+        if empty.any():
+            centers[empty] = data[random.choice(len(data), int(empty.sum()))]
+
+    return centers
+
+
+def nearest_centroids(data, centers):
+    """
+    :param data: (n, d) 행렬
+    :param centers: (k, d) 중심점 행렬
+    :return: 행마다 가장 가까운 (유클리드 거리) 중심점 번호
+    """
+    labels = numpy.empty(len(data), dtype=numpy.int64)
+    center_norms = (centers ** 2).sum(axis=1)
+
+    for start in range(0, len(data), BLOCK_ROWS):
+        block = data[start:start + BLOCK_ROWS]
+        # ||x - c||^2 = ||x||^2 - 2 x.c + ||c||^2 에서 행마다 같은 ||x||^2 는 빼고 비교
+        labels[start:start + len(block)] = (center_norms[None, :] - 2 * block.dot(centers.T)).argmin(axis=1)
+
+    return labels
+
+
+def load_vectors(path, mmap=True):
+    """
+    :param path: VectorTable / QuantizedVectorTable / PQVectorTable 의 save() 에 넘긴 경로
+    :param mmap: True 일 경우 읽기 전용 mmap
+    :return: 저장된 형식에 맞는 벡터 테이블
+    """
+    if os.path.exists(path + '.pq.npy'):
+        return PQVectorTable.load(path, mmap)
+    if os.path.exists(path + '.codes.npy'):
+        return QuantizedVectorTable.load(path, mmap)
+    return VectorTable.load(path, mmap)
+
+
+def recall_at_k(reference, approximate, k=10, queries=None, sample=1000, seed=1):
+    """
+    reference 의 most_similar 상위 k 개 중 approximate 의 상위 k 개에도 들어간 비율의 평균.
+
+    :param reference: 기준 테이블 (float32 VectorTable)
+    :param approximate: 비교할 테이블 (QuantizedVectorTable 등)
+    :param k: 비교할 상위 단어 수
+    :param queries: 질의 단어 리스트. None 이면 reference 단어 중 sample 개를 뽑음
+    :param sample: queries 가 None 일 때 뽑을 질의 단어 수
+    :param seed: 질의 단어를 뽑을 random seed
+    :return: recall@k (0 ~ 1)
+    """
+    if queries is None:
+        queries = reference.words
+        if len(queries) > sample:
+            picked = numpy.random.RandomState(seed).choice(len(queries), sample, replace=False)
+            queries = [queries[index] for index in sorted(picked)]
+
+    recalls = list()
+    for word in queries:
+        expected = {similar for similar, _ in reference.most_similar(word, topn=k)}
+        if not expected:
+            continue
+        found = {similar for similar, _ in approximate.most_similar(word, topn=k)}
+        recalls.append(len(expected & found) / len(expected))
+
+    return float(numpy.mean(recalls)) if recalls else 0.0
+
+
+def write_atomic(path, write):
+    """
+    :param path: 저장할 파일 경로
+    :param write: 열린 binary 파일을 받아서 내용을 쓰는 함수
+    """
+    tmp_path = "%s.%d.tmp" % (path, os.getpid())
+    with open(tmp_path, 'wb') as fp:
+        write(fp)
+    os.replace(tmp_path, path)
+
+
+def vectors_path(model_path, dtype='float32'):
+    """
+    :param model_path: gensim Word2Vec 모델 경로
+    :param dtype: 'float32', 'float16', 'int8', 'pq'
+    :return: 모델 옆에 저장하는 해당 형식의 벡터 파일 경로 (확장자 제외)
+    """
+    if dtype == 'float32':
+        return model_path + VECTORS_SUFFIX
+    return "%s%s.%s" % (model_path, VECTORS_SUFFIX, dtype)
+
+
+def save_shared(model, model_path):
+    """
+    load_shared() 로 읽을 수 있도록 gensim 모델 옆에 정규화 벡터 파일을 저장함. 모델을 저장할 때 같이 부름.
+
+    :param model: gensim Word2Vec
+    :param model_path: model 을 저장한 경로
+    """
+    VectorTable.from_model(model).save(vectors_path(model_path))
+
+
+def load_shared(model_path, dtype='float32'):
+    """
+    gensim 모델을 읽기 전용으로 여러 프로세스가 나눠 쓸 때 사용.
+    모델을 저장할 때 만들어 둔 벡터 파일 (save_shared, TrainModel.save 의 vector_dtypes) 을 mmap 해서
+    모든 프로세스가 같은 물리 메모리의 (정규화된 또는 양자화된) 벡터로 most_similar 를 계산함. 파일을 쓰지 않음.
+
+    :param model_path: gensim Word2Vec 모델 경로
+    :param dtype: 읽을 벡터 형식 ('float32', 'float16', 'int8', 'pq')
+    :return: mmap 된 VectorTable (float32 외에는 QuantizedVectorTable / PQVectorTable)
+    """
+    path = vectors_path(model_path, dtype)
+    if not os.path.exists(path + '.words'):
+        raise FileNotFoundError("%s: %s vectors not found "
+                                "(save the model with TrainModel.save(vector_dtypes=...) first)" % (path, dtype))
+    if os.path.getmtime(path + '.words') < os.path.getmtime(model_path):
+        raise ValueError("%s: %s vectors are older than the model (save the model again)" % (path, dtype))
+
+    return load_vectors(path, mmap=True)
+
+
+def normalize(matrix):
+    """
+    :param matrix: 벡터 또는 행렬
+    :return: (행마다) 길이를 1 로 맞춘 float32 배열. 길이가 0 인 행은 그대로
+    """
+    matrix = numpy.asarray(matrix, dtype=numpy.float32)
+    norms = numpy.linalg.norm(matrix, axis=-1, keepdims=True)
+    norms[norms == 0] = 1
+    return matrix / norms
+
+
+def orthogonal_procrustes(source, target):
+    """
+    ||source * R - target|| 를 최소로 하는 직교 행렬 R. (SVD 한 번)
+
+    :param source: (n, d) 행렬
+    :param target: (n, d) 행렬
+    :return: (d, d) 회전 행렬
+    """
+    u, _, vt = numpy.linalg.svd(source.T.dot(target))
+    return u.dot(vt)
+
+
+def align(base, other):
+    """
+    other 의 벡터 공간을 두 테이블이 공유하는 단어 기준으로 base 의 벡터 공간에 맞춰 회전함.
+
+    :param base: 기준 VectorTable
+    :param other: 회전할 VectorTable
+    :return: (base 공간으로 회전한 other 의 정규화 벡터 행렬, 공유 단어 리스트)
+    """
+    if base.matrix.shape[1] != other.matrix.shape[1]:
+        raise ValueError("vector size mismatch (%d != %d)" % (base.matrix.shape[1], other.matrix.shape[1]))
+
+    shared = [word for word in base.words if word in other.word2index]
+    if len(shared) < 2:
+        raise ValueError("need at least 2 shared words to align, got %d" % len(shared))
+
+    source = other.normalized[[other.word2index[word] for word in shared]]
+    target = base.normalized[[base.word2index[word] for word in shared]]
+
+    return other.normalized.dot(orthogonal_procrustes(source, target)), shared
+
+
+def merge(base, other):
+    """
+    다시 학습하지 않고 두 벡터 테이블을 합침.
+    other 를 base 공간으로 회전한 뒤, 공유 단어는 두 벡터의 평균, 나머지는 각자의 벡터를 사용함.
+
+    :param base: 기준 VectorTable
+    :param other: 합칠 VectorTable
+    :return: 두 테이블의 단어를 모두 가진 VectorTable (정규화된 벡터)
+    """
+    aligned, shared = align(base, other)
+
+    words = base.words + [word for word in other.words if word not in base.word2index]
+    matrix = numpy.zeros((len(words), base.matrix.shape[1]), dtype=numpy.float32)
+    matrix[:len(base)] = base.normalized
+
+    base_rows = [base.word2index[word] for word in shared]
+    other_rows = [other.word2index[word] for word in shared]
+    matrix[base_rows] = (base.normalized[base_rows] + aligned[other_rows]) / 2
+
+    only_other = [other.word2index[word] for word in words[len(base):]]
+    matrix[len(base):] = aligned[only_other]
+
+    return VectorTable(words, normalize(matrix))